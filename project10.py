@@ -12,14 +12,22 @@
 
 Особенности:
 - Визуализация исходных многоугольников
-- Отображение точек пересечения
+- Отображение точек пересечения (поиск по равномерной сетке, включая дыры)
 - Вывод результата отсечения
 - Корректная обработка дыр
+- Двусвязные списки вершин с флагами входа/выхода, обход за линейное время
+- Заливка многоугольников с дырами построчным алгоритмом (правила even-odd и nonzero)
+- Булевы операции (пересечение, объединение, разность, исключающее ИЛИ)
+  с привязкой координат к целочисленной сетке
 - Интерактивное управление
 
 Управление:
 - Пробел - показать/скрыть этапы
 - Стрелки влево/вправо - переключение этапов
+- F - показать/скрыть заливку
+- R - сменить правило заливки
+- O - сменить булеву операцию
+- B - тест производительности
 
 Автор: Царюк Артём Владимирович
 Дата: 02.12.2024
@@ -27,6 +35,27 @@
 
 import pygame
 import numpy as np
+import time
+from utils.geometry import GeometryUtils
+from utils.graphics import GraphicsBuffer
+from utils.scanline import PolygonFiller
+
+# Булевы операции над многоугольниками
+BOOLEAN_OPERATIONS = ("intersection", "union", "difference", "xor")
+
+# Сдвиг отсекающего многоугольника в долях шага сетки (иррациональный наклон)
+SNAP_PERTURBATION = (1e-3 * 2 ** 0.5 / 2, 1e-3 * 3 ** 0.5 / 2)
+
+class ClipVertex:
+    """Вершина контура в кольцевом двусвязном списке Вейлера-Азертона"""
+    def __init__(self, point, intersection=False):
+        self.point = point
+        self.next = None
+        self.prev = None
+        self.intersection = intersection
+        self.neighbor = None   # Та же точка пересечения в списке другого многоугольника
+        self.entry = False     # Контур входит в другой многоугольник в этой точке
+        self.visited = False
 
 class WeilerAthertonClipper:
     def __init__(self):
@@ -49,141 +78,376 @@ class WeilerAthertonClipper:
         
         # Результаты отсечения
         self.intersection_points = []
-        self.result_polygon = None
-
-    def get_intersection(self, p1, p2, p3, p4):
-        """Находит точку пересечения двух отрезков"""
-        x1, y1 = p1
-        x2, y2 = p2
-        x3, y3 = p3
-        x4, y4 = p4
-        
-        denominator = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
-        if denominator == 0:
-            return None
-            
-        t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denominator
+        self.crossings = None
+        self.result_polygons = []
+        self.operation = "intersection"
+        self.snap = 1e-6  # Шаг сетки привязки координат
         
-        if 0 <= t <= 1:
-            x = x1 + t * (x2 - x1)
-            y = y1 + t * (y2 - y1)
-            return (x, y)
-        return None
+        # Буфер для заливки многоугольников
+        self.buffer = GraphicsBuffer(self.width, self.height)
+        self.fill_rule = "evenodd"  # или "nonzero"
+
+    @staticmethod
+    def polygon_rings(polygon):
+        """Контуры многоугольника: внешний и дыры ('inner' - одна дыра или список дыр).
+        Список контуров возвращается как есть."""
+        if not isinstance(polygon, dict):
+            return list(polygon)
+        holes = polygon.get('inner') or []
+        if len(holes) and np.ndim(holes[0]) == 1:
+            holes = [holes]
+        return [polygon['outer']] + list(holes)
+
+    def polygon_edges(self, polygon):
+        """Ребра всех контуров в виде массива (E, 4) с номерами контура и ребра в контуре"""
+        segments, ring_ids, edge_ids = [], [], []
+        for ring_id, ring in enumerate(self.polygon_rings(polygon)):
+            points = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            segments.append(np.concatenate([points, np.roll(points, -1, axis=0)], axis=1))
+            ring_ids.append(np.full(len(points), ring_id))
+            edge_ids.append(np.arange(len(points)))
+        if not segments:
+            return np.zeros((0, 4)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(segments), np.concatenate(ring_ids), np.concatenate(edge_ids)
 
     def find_intersections(self, polygon1, polygon2):
-        """Находит все точки пересечения между двумя многоугольниками"""
-        intersections = []
+        """Находит все пересечения границ двух многоугольников, включая дыры.
         
-        # Проверяем пересечения между внешними границами
-        for i in range(len(polygon1['outer'])):
-            p1 = polygon1['outer'][i]
-            p2 = polygon1['outer'][(i + 1) % len(polygon1['outer'])]
-            
-            for j in range(len(polygon2['outer'])):
-                p3 = polygon2['outer'][j]
-                p4 = polygon2['outer'][(j + 1) % len(polygon2['outer'])]
-                
-                intersection = self.get_intersection(p1, p2, p3, p4)
-                if intersection:
-                    intersections.append(intersection)
-        
-        # Проверяем пересечения с внутренними дырами
-        for hole in [polygon1['inner'], polygon2['inner']]:
-            for i in range(len(hole)):
-                p1 = hole[i]
-                p2 = hole[(i + 1) % len(hole)]
-                
-                for j in range(len(polygon2['outer'])):
-                    p3 = polygon2['outer'][j]
-                    p4 = polygon2['outer'][(j + 1) % len(polygon2['outer'])]
-                    
-                    intersection = self.get_intersection(p1, p2, p3, p4)
-                    if intersection:
-                        intersections.append(intersection)
-        
-        return intersections
+        Ребра раскладываются по равномерной сетке (GeometryUtils.segment_intersections),
+        так что проверяются только пары из общих ячеек, а не все n*m пар.
+        Для каждого пересечения возвращаются номера контура и ребра в обоих
+        многоугольниках, параметры t на этих ребрах и сама точка.
+        """
+        edges1, rings1, index1 = self.polygon_edges(polygon1)
+        edges2, rings2, index2 = self.polygon_edges(polygon2)
+        i, j, t, u, points = GeometryUtils.segment_intersections(edges1, edges2)
+        return {
+            'point': points,
+            'subject_ring': rings1[i], 'subject_edge': index1[i], 'subject_t': t,
+            'clip_ring': rings2[j], 'clip_edge': index2[j], 'clip_t': u
+        }
 
-    def is_inside(self, point, polygon):
-        """Проверяет, находится ли точка внутри многоугольника"""
+    @staticmethod
+    def point_in_rings(point, rings):
+        """Проверяет точку по правилу четности относительно всех контуров многоугольника"""
         x, y = point
-        n = len(polygon)
         inside = False
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            x1, y1 = ring[:, 0], ring[:, 1]
+            x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+            crosses = (y1 > y) != (y2 > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xs = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            inside ^= bool(np.count_nonzero(crosses & (x < xs)) & 1)
+        return inside
+
+    @staticmethod
+    def link_ring(ring, edges, ts, crossing_ids, points, nodes):
+        """Кольцевой двусвязный список вершин контура со вставленными пересечениями.
         
-        for i in range(n):
-            j = (i + 1) % n
-            if ((polygon[i][1] > y) != (polygon[j][1] > y) and
-                x < (polygon[j][0] - polygon[i][0]) * (y - polygon[i][1]) /
-                    (polygon[j][1] - polygon[i][1]) + polygon[i][0]):
-                inside = not inside
+        Пересечения упорядочиваются по номеру ребра и параметру t на нем;
+        узел пересечения k записывается в nodes[k]. Возвращает первую вершину.
+        """
+        order = np.lexsort((ts, edges))
+        edges, crossing_ids = edges[order].tolist(), crossing_ids[order].tolist()
         
-        return inside
+        chain, k = [], 0
+        for i, point in enumerate(np.asarray(ring, dtype=np.float64).tolist()):
+            chain.append(ClipVertex(tuple(point)))
+            while k < len(edges) and edges[k] == i:
+                node = ClipVertex(points[crossing_ids[k]], intersection=True)
+                nodes[crossing_ids[k]] = node
+                chain.append(node)
+                k += 1
+        
+        for vertex, following in zip(chain, chain[1:] + chain[:1]):
+            vertex.next, following.prev = following, vertex
+        return chain[0]
 
-    def weiler_atherton_clip(self):
-        """Алгоритм Вейлера-Азертона"""
-        # Находим все точки пересечения
-        self.intersection_points = self.find_intersections(
-            self.subject_polygon, self.clip_polygon)
-        
-        # Создаем списки вершин для обхода
-        subject_list = []
-        clip_list = []
-        
-        # Добавляем вершины и точки пересечения в списки
-        for i in range(len(self.subject_polygon['outer'])):
-            subject_list.append(('v', self.subject_polygon['outer'][i]))
-            
-            # Добавляем точки пересечения
-            for point in self.intersection_points:
-                if self.is_on_edge(point, 
-                                 self.subject_polygon['outer'][i],
-                                 self.subject_polygon['outer'][(i + 1) % len(self.subject_polygon['outer'])]):
-                    subject_list.append(('i', point))
-        
-        for i in range(len(self.clip_polygon['outer'])):
-            clip_list.append(('v', self.clip_polygon['outer'][i]))
+    def mark_entries(self, head, other_rings, invert=False):
+        """Расставляет флаги входа/выхода пересечений контура.
+        
+        Положение относительно другого многоугольника проверяется один раз в
+        середине первого участка ненулевой длины, дальше оно меняется на
+        противоположное в каждой точке пересечения. invert меняет вход и
+        выход местами (обход частей контура снаружи другого многоугольника).
+        """
+        start = head
+        while start.point == start.next.point and start.next is not head:
+            start = start.next
+        probe = ((start.point[0] + start.next.point[0]) / 2,
+                 (start.point[1] + start.next.point[1]) / 2)
+        inside = self.point_in_rings(probe, other_rings)
+        
+        node = start.next
+        while True:
+            if node.intersection:
+                node.entry = inside == invert
+                inside = not inside
+            if node is start:
+                break
+            node = node.next
+
+    @staticmethod
+    def traverse(nodes):
+        """Обход графа: от пересечения идем вперед по контуру, если это вход, и
+        назад, если выход, до следующего пересечения, где переходим на контур
+        другого многоугольника. Каждый участок проходится один раз.
+        
+        Контур начинается только со входа исходного многоугольника, тогда
+        все контуры результата обходятся в одном направлении (область слева).
+        """
+        rings = []
+        for start in nodes:
+            if start.visited or not start.entry:
+                continue
+            ring = []
+            current = start
+            while not current.visited:
+                current.visited = current.neighbor.visited = True
+                forward = current.entry
+                ring.append(current.point)
+                current = current.next if forward else current.prev
+                while not current.intersection:
+                    ring.append(current.point)
+                    current = current.next if forward else current.prev
+                current = current.neighbor
             
-            # Добавляем точки пересечения
-            for point in self.intersection_points:
-                if self.is_on_edge(point,
-                                 self.clip_polygon['outer'][i],
-                                 self.clip_polygon['outer'][(i + 1) % len(self.clip_polygon['outer'])]):
-                    clip_list.append(('i', point))
-        
-        # Сортируем точки пересечения
-        subject_list.sort(key=lambda x: (x[1][0], x[1][1]))
-        clip_list.sort(key=lambda x: (x[1][0], x[1][1]))
-        
-        # Формируем результат отсечения
+            # Пересечения в вершинах дают повторяющиеся точки
+            ring = [point for i, point in enumerate(ring) if point != ring[i - 1]]
+            if len(ring) >= 3:
+                rings.append(ring)
+        return rings
+
+    def assemble(self, rings):
+        """Собирает контуры результата в многоугольники {'outer', 'inner'}:
+        контуры против часовой стрелки - внешние, по часовой - дыры, контуры
+        нулевой площади отбрасываются. Дыра относится к наименьшему внешнему
+        контуру, который ее содержит."""
+        if not rings:
+            return []
+        
+        # Площади и габариты всех контуров одним массивом
+        lengths = np.array([len(ring) for ring in rings])
+        starts = np.cumsum(lengths) - lengths
+        points = np.array([point for ring in rings for point in ring], dtype=np.float64)
+        following = np.arange(len(points)) + 1
+        following[starts + lengths - 1] = starts
+        x, y = points[:, 0], points[:, 1]
+        areas = 0.5 * np.add.reduceat(x * y[following] - x[following] * y, starts)
+        low = np.minimum.reduceat(points, starts)
+        high = np.maximum.reduceat(points, starts)
+        
+        outers = np.flatnonzero(areas > 0)
+        outers = outers[np.argsort(areas[outers], kind="stable")]
+        polygons = {i: {'outer': rings[i], 'inner': []} for i in outers.tolist()}
+        holes = np.flatnonzero(areas < 0).tolist()
+        if len(polygons) == 1:
+            # Единственный внешний контур содержит все дыры
+            polygons[outers[0]]['inner'] = [rings[i] for i in holes]
+            return list(polygons.values())
+        
+        for i in holes:
+            ring = rings[i]
+            probe = ((ring[0][0] + ring[1][0]) / 2, (ring[0][1] + ring[1][1]) / 2)
+            candidates = outers[np.all((low[outers] <= probe) & (high[outers] >= probe), axis=1)]
+            for k in candidates.tolist():
+                if self.point_in_rings(probe, [rings[k]]):
+                    polygons[k]['inner'].append(ring)
+                    break
+        return list(polygons.values())
+
+    def overlay(self, subject_rings, clip_rings, operation="intersection"):
+        """Контуры результата булевой операции методом Вейлера-Азертона.
+        
+        Все контуры должны быть приведены к одной ориентации (внешние против
+        часовой стрелки, дыры по ней), тогда область результата всегда лежит
+        слева от обхода. Объединение и разность получаются инверсией флагов
+        входа/выхода: для объединения у обоих многоугольников, для разности -
+        у уменьшаемого, так что обход идет по его границе вне вычитаемого.
+        """
+        invert_subject = operation in ("union", "difference")
+        invert_clip = operation == "union"
+        crossings = self.find_intersections(subject_rings, clip_rings)
+        self.crossings = crossings
+        
+        # Пересечение в вершине находится на двух соседних ребрах (t = 1 и t = 0)
+        keep = (crossings['subject_t'] < 1) & (crossings['clip_t'] < 1)
+        points = [tuple(point) for point in crossings['point'][keep].tolist()]
+        crossing_ids = np.arange(len(points))
+        subject_nodes, clip_nodes = [None] * len(points), [None] * len(points)
+        
         result = []
-        current = subject_list[0]
-        while current in subject_list:
-            result.append(current[1])
-            if current[0] == 'i':
-                # Переключаемся на другой список
-                idx = clip_list.index(current)
-                current = clip_list[(idx + 1) % len(clip_list)]
+        for side, rings, nodes, other_rings, invert in (
+                ('subject', subject_rings, subject_nodes, clip_rings, invert_subject),
+                ('clip', clip_rings, clip_nodes, subject_rings, invert_clip)):
+            ring_ids = crossings[side + '_ring'][keep]
+            edges = crossings[side + '_edge'][keep]
+            ts = crossings[side + '_t'][keep]
+            for ring_id, ring in enumerate(rings):
+                on_ring = ring_ids == ring_id
+                head = self.link_ring(ring, edges[on_ring], ts[on_ring],
+                                      crossing_ids[on_ring], points, nodes)
+                if on_ring.any():
+                    self.mark_entries(head, other_rings, invert)
+                elif self.point_in_rings(ring[0], other_rings) != invert:
+                    # Контур без пересечений внутри другого многоугольника
+                    # (для объединения и разности уменьшаемого - снаружи)
+                    ring = [tuple(point) for point in ring.tolist()]
+                    if operation == "difference" and side == 'clip':
+                        ring.reverse()  # Граница вычитаемого становится дырой
+                    result.append(ring)
+        
+        for subject_node, clip_node in zip(subject_nodes, clip_nodes):
+            subject_node.neighbor, clip_node.neighbor = clip_node, subject_node
+        
+        return result + self.traverse(subject_nodes)
+
+    @staticmethod
+    def clean_ring(ring):
+        """Убирает повторяющиеся вершины и вершины на одной прямой с соседними
+        (в том числе шипы a, b, a), появившиеся после привязки к сетке.
+        Возвращает None, если от контура ничего не осталось."""
+        def collinear(a, b, c):
+            return (b[0] - a[0]) * (c[1] - b[1]) == (b[1] - a[1]) * (c[0] - b[0])
+        
+        points = []
+        for point in ring:
+            while len(points) >= 2 and collinear(points[-2], points[-1], point):
+                points.pop()
+            if not points or points[-1] != point:
+                points.append(point)
+        
+        # То же через стык конца и начала контура
+        while len(points) >= 3:
+            if points[0] == points[-1] or collinear(points[-2], points[-1], points[0]):
+                points.pop()
+            elif collinear(points[-1], points[0], points[1]):
+                points.pop(0)
             else:
-                idx = subject_list.index(current)
-                current = subject_list[(idx + 1) % len(subject_list)]
+                break
         
-        self.result_polygon = result
+        return points if len(points) >= 3 else None
 
-    def is_on_edge(self, point, edge_start, edge_end):
-        """Проверяет, лежит ли точка на отрезке"""
-        x, y = point
-        x1, y1 = edge_start
-        x2, y2 = edge_end
-        
-        # Проверяем, что точка лежит на прямой
-        cross_product = (y2 - y1) * (x - x1) - (x2 - x1) * (y - y1)
-        if abs(cross_product) > 1e-9:
-            return False
-        
-        # Проверяем, что точка лежит между концами отрезка
-        if x1 != x2:
-            return min(x1, x2) <= x <= max(x1, x2)
-        else:
-            return min(y1, y2) <= y <= max(y1, y2)
+    def boolean(self, subject, clip, operation="intersection", snap=None):
+        """Булева операция над многоугольниками с дырами.
+        
+        Многоугольники задаются как {'outer': [...], 'inner': [...]}, результат -
+        список многоугольников {'outer': [...], 'inner': [[...], ...]}.
+        Исключающее ИЛИ собирается из двух разностей (части касаются по границе).
+        
+        Для устойчивости координаты привязываются к целочисленной сетке с шагом
+        snap > 0 (по умолчанию self.snap), а отсекающий многоугольник
+        сдвигается на долю шага сетки в направлении с иррациональным наклоном. После сдвига общие вершины, вершины на ребрах
+        и совпадающие ребра перестают быть вырожденными, а округление
+        результата обратно на сетку убирает сдвиг.
+        """
+        if operation not in BOOLEAN_OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if operation == "xor":
+            return (self.boolean(subject, clip, "difference", snap) +
+                    self.boolean(clip, subject, "difference", snap))
+        
+        snap = self.snap if snap is None else snap
+        if not snap > 0:
+            # Без привязки совпадающие ребра и вершины на ребрах вырождены
+            raise ValueError(f"Snap step must be positive: {snap}")
+        
+        subject_rings = self.polygon_rings(subject)
+        clip_rings = self.polygon_rings(clip)
+        points = np.concatenate([np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                                 for ring in subject_rings + clip_rings])
+        origin = np.floor(points.min(axis=0) / snap)
+        
+        def to_grid(rings):
+            # Целочисленные координаты относительно начала сетки
+            rings = [self.clean_ring([tuple(point) for point in (
+                np.rint(np.asarray(ring, dtype=np.float64) / snap) - origin).tolist()])
+                for ring in rings]
+            if rings[0] is None:
+                return []
+            return PolygonFiller.rings({'outer': rings[0], 'inner': [ring for ring in rings[1:] if ring]})
+        
+        perturbation = np.array(SNAP_PERTURBATION)
+        rings = self.overlay(to_grid(subject_rings),
+                             [ring + perturbation for ring in to_grid(clip_rings)], operation)
+        self.crossings['point'] = (np.rint(self.crossings['point']) + origin) * snap
+        
+        # Округляем результат на сетку и возвращаем в исходные координаты
+        # одним массивом для всех контуров
+        grid_points = np.rint(np.array([point for ring in rings for point in ring]).reshape(-1, 2))
+        cleaned, start = [], 0
+        for ring in rings:
+            cleaned_ring = self.clean_ring(
+                [tuple(point) for point in grid_points[start:start + len(ring)].tolist()])
+            start += len(ring)
+            if cleaned_ring:
+                cleaned.append(cleaned_ring)
+        
+        points = np.array([point for ring in cleaned for point in ring]).reshape(-1, 2)
+        points = ((points + origin) * snap).tolist()
+        result, start = [], 0
+        for ring in cleaned:
+            result.append([tuple(point) for point in points[start:start + len(ring)]])
+            start += len(ring)
+        return self.assemble(result)
+
+    def weiler_atherton_clip(self):
+        """Алгоритм Вейлера-Азертона (текущая булева операция)"""
+        self.result_polygons = self.boolean(self.subject_polygon, self.clip_polygon, self.operation)
+        self.intersection_points = [tuple(point) for point in self.crossings['point'].tolist()]
+
+    @staticmethod
+    def random_polygon(num_vertices, center=(0.0, 0.0), radius=10.0):
+        """Случайный звездный многоугольник с волнистой границей и дырой в центре"""
+        angles = np.sort(np.random.uniform(0, 2 * np.pi, num_vertices))
+        waves = np.random.randint(3, 20)
+        radii = radius * (0.8 + 0.15 * np.sin(waves * angles + np.random.uniform(0, 2 * np.pi)) +
+                          np.random.uniform(0, 0.05, num_vertices))
+        num_hole = max(3, num_vertices // 4)
+        hole_angles = np.sort(np.random.uniform(0, 2 * np.pi, num_hole))
+        hole_radii = radius * np.random.uniform(0.2, 0.25, num_hole)
+        
+        def ring(angles, radii):
+            return [(center[0] + r * np.cos(a), center[1] + r * np.sin(a))
+                    for a, r in zip(angles.tolist(), radii.tolist())]
+        return {'outer': ring(angles, radii), 'inner': [ring(hole_angles, hole_radii)]}
+
+    def benchmark(self, sizes=(16, 128, 1024, 8192), repeats=3):
+        """Среднее время каждой булевой операции для случайных многоугольников
+        разного размера: {число вершин: {операция: секунды}}"""
+        results = {}
+        for size in sizes:
+            results[size] = dict.fromkeys(BOOLEAN_OPERATIONS, 0.0)
+            for _ in range(repeats):
+                subject = self.random_polygon(size)
+                clip = self.random_polygon(size, center=np.random.uniform(-5, 5, 2).tolist())
+                for operation in BOOLEAN_OPERATIONS:
+                    start_time = time.time()
+                    self.boolean(subject, clip, operation)
+                    results[size][operation] += (time.time() - start_time) / repeats
+        return results
+
+    def to_screen(self, polygon):
+        """Переводит многоугольник (список вершин или {'outer', 'inner'}) в координаты экрана"""
+        def transform(points):
+            return [(self.offset[0] + x * self.scale,
+                     self.offset[1] + y * self.scale) for x, y in points]
+        if isinstance(polygon, dict):
+            return {'outer': transform(polygon['outer']),
+                    'inner': [transform(hole) for hole in self.polygon_rings(polygon)[1:]]}
+        return transform(polygon)
+
+    def fill_polygons(self):
+        """Заливка исходного, отсекающего и результирующего многоугольников отрезками строк"""
+        self.buffer.clear()
+        PolygonFiller.fill(self.buffer, self.to_screen(self.subject_polygon), self.fill_rule, 0.25)
+        PolygonFiller.fill(self.buffer, self.to_screen(self.clip_polygon), self.fill_rule, 0.15)
+        for polygon in self.result_polygons:
+            PolygonFiller.fill(self.buffer, self.to_screen(polygon), self.fill_rule, 0.4)
+        self.buffer.update()
+        return self.buffer.surface
 
     def draw(self, screen):
         """Отрисовка всех элементов"""
@@ -217,12 +481,13 @@ class WeilerAthertonClipper:
             y = self.offset[1] + point[1] * self.scale
             pygame.draw.circle(screen, (255, 0, 0), (int(x), int(y)), 3)
         
-        # Рисуем результат отсечения
-        if self.result_polygon:
-            points = [(self.offset[0] + x * self.scale,
-                      self.offset[1] + y * self.scale) 
-                     for x, y in self.result_polygon]
-            pygame.draw.polygon(screen, (0, 255, 0), points, 2)
+        # Рисуем результат отсечения (внешние контуры и дыры)
+        for polygon in self.result_polygons:
+            for ring in self.polygon_rings(polygon):
+                points = [(self.offset[0] + x * self.scale,
+                          self.offset[1] + y * self.scale) 
+                         for x, y in ring]
+                pygame.draw.polygon(screen, (0, 255, 0), points, 2)
 
 def main():
     pygame.init()
@@ -235,15 +500,35 @@ def main():
     
     # Выполняем начальное отсечение
     clipper.weiler_atherton_clip()
+    show_fill = True
     
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 return
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_f:
+                    show_fill = not show_fill
+                elif event.key == pygame.K_r:
+                    clipper.fill_rule = "nonzero" if clipper.fill_rule == "evenodd" else "evenodd"
+                elif event.key == pygame.K_o:
+                    # Следующая булева операция
+                    index = BOOLEAN_OPERATIONS.index(clipper.operation)
+                    clipper.operation = BOOLEAN_OPERATIONS[(index + 1) % len(BOOLEAN_OPERATIONS)]
+                    clipper.weiler_atherton_clip()
+                elif event.key == pygame.K_b:
+                    # Запуск теста производительности
+                    for size, timings in clipper.benchmark().items():
+                        print(f"{size} vertices: " + ", ".join(
+                            f"{operation} {seconds*1000:.3f} ms" for operation, seconds in timings.items()))
         
         screen.fill((0, 0, 0))
         
+        # Заливка многоугольников под контурами
+        if show_fill:
+            screen.blit(clipper.fill_polygons(), (0, 0))
+        
         # Отрисовка всех элементов
         clipper.draw(screen)
         
@@ -252,8 +537,12 @@ def main():
             "Точки пересечения:",
             *[f"({x:.1f}, {y:.1f})" for x, y in clipper.intersection_points],
             "",
-            "Результат отсечения:",
-            *[f"({x:.1f}, {y:.1f})" for x, y in (clipper.result_polygon or [])]
+            f"Результат ({clipper.operation}, O):",
+            *[f"{i + 1}: " + " ".join(f"({x:.1f}, {y:.1f})" for x, y in polygon['outer']) +
+              (f", дыр: {len(polygon['inner'])}" if polygon['inner'] else "")
+              for i, polygon in enumerate(clipper.result_polygons)],
+            "",
+            f"Правило заливки: {clipper.fill_rule} (R), заливка: F"
         ]
         
         y_offset = 10
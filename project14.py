@@ -1,9 +1,10 @@
 """
 Проект 14: Растеризация эллипса
 
-Реализация двух алгоритмов растеризации эллипса:
+Реализация алгоритмов растеризации эллипса:
 1. Алгоритм Брезенхема для эллипса
 2. Полупиксельный алгоритм
+3. Целочисленный алгоритм по коническому уравнению (поворот, дуги, заливка)
 
 Тестовые параметры:
 - Размер псевдорастра: 32x32
@@ -17,10 +18,17 @@
 - Тест производительности на 100 эллипсах
 - Поддержка градаций серого
 - Вывод координат точек
+- LRU-кэш готовых контуров эллипсов по полуосям
+- Повернутые эллипсы, эллиптические дуги и заливка отрезками строк
+- Закрашенный эллипс Брезенхема по отрезкам строк
 
 Управление:
 - 1 - Алгоритм Брезенхема
 - 2 - Полупиксельный алгоритм
+- 3 - Целочисленный алгоритм
+- R - Поворот на 15 градусов (алгоритм 3)
+- F - Заливка (алгоритмы 1 и 3)
+- A - Дуга 0..270 градусов (алгоритм 3)
 - B - Тест производительности
 
 Автор: Царюк Артём Владимирович
@@ -29,7 +37,8 @@
 
 import pygame
 import numpy as np
-from utils.graphics import GraphicsBuffer
+import math
+from utils.graphics import GraphicsBuffer, StencilCache
 from utils.ui import UIManager
 from utils.benchmark import Benchmark
 import sys
@@ -53,11 +62,22 @@ class EllipseRasterizer:
         self.a = 15  # Большая полуось
         self.b = 20  # Малая полуось
         
+        # Число подпикселей по каждой оси для полупиксельного алгоритма
+        self.subpixel_size = 4
+        
         # Список точек для вывода
         self.points = []
         
         # Текущий алгоритм
-        self.current_algorithm = "bresenham"  # или "subpixel"
+        self.current_algorithm = "bresenham"  # "subpixel" или "integer"
+        
+        # Параметры целочисленного алгоритма
+        self.angle = 0.0
+        self.filled = False
+        self.arc = None
+        
+        # Кэш готовых контуров: смещения пикселей от центра по (алгоритм, a, b)
+        self.stencils = StencilCache()
 
     def clear_buffer(self):
         """Очистка буфера"""
@@ -66,94 +86,269 @@ class EllipseRasterizer:
 
     def bresenham_ellipse(self):
         """Алгоритм Брезенхема для эллипса"""
+        self.plot_points(*self.bresenham_quadrant(self.a, self.b))
+
+    def bresenham_quadrant(self, a, b):
+        """Точки первого квадранта эллипса с полуосями a, b (алгоритм Брезенхема).
+
+        Решающие переменные умножены на 4, поэтому вычисления целочисленные
+        (0.25 * a^2 и (x + 0.5)^2 становятся a^2 и (2x + 1)^2).
+        """
         x = 0
-        y = self.b
+        y = b
+        xs, ys = [], []
+        
+        # Постоянные приращения вычисляются один раз
+        a2 = a * a
+        b2 = b * b
+        two_a2 = 2 * a2
+        two_b2 = 2 * b2
         
         # Начальные значения для облати 1
-        d1 = (self.b * self.b) - (self.a * self.a * self.b) + (0.25 * self.a * self.a)
-        dx = 2 * self.b * self.b * x
-        dy = 2 * self.a * self.a * y
+        d1 = 4 * b2 - 4 * a2 * b + a2
+        dx = 0
+        dy = two_a2 * y
         
         # Первая область
         while dx < dy:
-            self.plot_points(x, y)
+            xs.append(x)
+            ys.append(y)
             
+            x += 1
+            dx += two_b2
             if d1 < 0:
-                x += 1
-                dx += 2 * self.b * self.b
-                d1 += dx + self.b * self.b
+                d1 += 4 * (dx + b2)
             else:
-                x += 1
                 y -= 1
-                dx += 2 * self.b * self.b
-                dy -= 2 * self.a * self.a
-                d1 += dx - dy + self.b * self.b
+                dy -= two_a2
+                d1 += 4 * (dx - dy + b2)
         
         # Начальные значения для области 2
-        d2 = ((self.b * self.b) * ((x + 0.5) * (x + 0.5))) + \
-             ((self.a * self.a) * ((y - 1) * (y - 1))) - \
-             (self.a * self.a * self.b * self.b)
+        d2 = b2 * (2 * x + 1) * (2 * x + 1) + 4 * a2 * (y - 1) * (y - 1) - 4 * a2 * b2
         
         # Вторая область
         while y >= 0:
-            self.plot_points(x, y)
+            xs.append(x)
+            ys.append(y)
             
+            y -= 1
+            dy -= two_a2
             if d2 > 0:
-                y -= 1
-                dy -= 2 * self.a * self.a
-                d2 += self.a * self.a - dy
+                d2 += 4 * (a2 - dy)
             else:
-                y -= 1
                 x += 1
-                dx += 2 * self.b * self.b
-                dy -= 2 * self.a * self.a
-                d2 += dx - dy + self.a * self.a
+                dx += two_b2
+                d2 += 4 * (dx - dy + a2)
+        
+        return np.array(xs), np.array(ys)
+
+    def midpoint_spans(self, a, b):
+        """Отрезки строк (y, x0, x1) закрашенного эллипса относительно центра.
 
-    def subpixel_ellipse(self):
-        """Полупиксельный алгоритм для эллипса"""
-        # Создаем массив подпикселей (4x4 для каждого пикселя)
-        subpixel_size = 4
-        subpixel_buffer = np.zeros((self.raster_size * subpixel_size, 
-                                  self.raster_size * subpixel_size))
+        Полуширина строки - наибольший x точки квадранта Брезенхема в ней
+        (x в квадранте не убывает, а y не возрастает), так что заливка
+        ограничена тем же контуром, что и bresenham_ellipse.
+        """
+        x, y = self.bresenham_quadrant(a, b)
+        last = np.r_[y[1:] != y[:-1], True]
+        x, y = x[last], y[last]
+        
+        # Отражаем строки в нижнюю половину, строку y=0 не дублируем
+        lower = y > 0
+        ys = np.concatenate([y, -y[lower]])
+        half = np.concatenate([x, x[lower]])
+        return ys, -half, half
+
+    def filled_ellipse(self, cx=0, cy=0):
+        """Закрашенный эллипс с центром (cx, cy) от центра растра"""
+        ys, x0s, x1s = self.midpoint_spans(self.a, self.b)
+        center = self.raster_size // 2
+        self.buffer.set_spans(ys + cy + center, x0s + cx + center, x1s + cx + center)
+
+    def subpixel_ellipse(self, subpixel_size=None):
+        """Полупиксельный алгоритм для эллипса (целиком на массивах NumPy)"""
+        # Создаем массив подпикселей (subpixel_size x subpixel_size для каждого пикселя)
+        subpixel_size = subpixel_size or self.subpixel_size
+        size = self.raster_size * subpixel_size
+        subpixel_buffer = np.zeros((size, size), dtype=np.uint8)
         
         # Масштабируем параметры эллипса
         a_sub = self.a * subpixel_size
         b_sub = self.b * subpixel_size
         
-        # Рисуем эллипс в подпиксельном буфере
-        for x in range(-a_sub, a_sub + 1):
-            y = int(b_sub * np.sqrt(1 - (x/a_sub)**2))
-            for dy in [-1, 1]:
-                sub_x = x + a_sub
-                sub_y = y * dy + b_sub
-                if 0 <= sub_x < self.raster_size * subpixel_size and \
-                   0 <= sub_y < self.raster_size * subpixel_size:
-                    subpixel_buffer[int(sub_y), int(sub_x)] = 1
-        
-        # Преобразуем подпиксельный буфер в обычный
-        for y in range(self.raster_size):
-            for x in range(self.raster_size):
-                subpixels = subpixel_buffer[y*subpixel_size:(y+1)*subpixel_size,
-                                          x*subpixel_size:(x+1)*subpixel_size]
-                self.buffer.set_pixel(x, y, np.sum(subpixels) / (subpixel_size * subpixel_size))
-                if self.buffer.get_pixel(x, y) > 0:
-                    self.points.append((x - self.raster_size//2, 
-                                     y - self.raster_size//2))
+        # Контур вычисляется сразу для всех x (пологие участки)
+        # и для всех y (крутые участки), чтобы в нем не было разрывов
+        x = np.arange(-a_sub, a_sub + 1)
+        y = (b_sub * np.sqrt(1 - (x / a_sub)**2)).astype(np.int64)
+        y_steep = np.arange(-b_sub, b_sub + 1)
+        x_steep = (a_sub * np.sqrt(1 - (y_steep / b_sub)**2)).astype(np.int64)
+        
+        sub_x = np.concatenate([x, x, x_steep, -x_steep]) + a_sub
+        sub_y = np.concatenate([y, -y, y_steep, y_steep]) + b_sub
+        inside = (sub_x >= 0) & (sub_x < size) & (sub_y >= 0) & (sub_y < size)
+        subpixel_buffer[sub_y[inside], sub_x[inside]] = 1
+        
+        # Сворачиваем блоки подпикселей в покрытие пикселей: сначала суммируем
+        # строки подпикселей внутри блока, затем столбцы (так быстрее, чем axis=(1, 3))
+        rows_sum = subpixel_buffer.reshape(self.raster_size, subpixel_size, size).sum(
+            axis=1, dtype=np.uint16)
+        coverage = rows_sum.reshape(self.raster_size, self.raster_size, subpixel_size).sum(axis=2)
+        coverage = coverage / (subpixel_size * subpixel_size)
+        
+        # Записываем все ненулевые пиксели одним пакетом
+        rows, columns = np.nonzero(coverage)
+        self.buffer.set_pixels(columns, rows, coverage[rows, columns])
+        self.points.extend(zip((columns - self.raster_size//2).tolist(),
+                               (rows - self.raster_size//2).tolist()))
+
+    def ellipse_stencil(self, a, b):
+        """Шаблон контура эллипса Брезенхема из кэша (строится при первом обращении)"""
+        def build():
+            x, y = self.bresenham_quadrant(a, b)
+            return (np.concatenate([x, -x, x, -x]), np.concatenate([y, y, -y, -y]))
+        return self.stencils.get(("bresenham", a, b), build)
+
+    def cached_ellipse(self, cx=0, cy=0):
+        """Отрисовка эллипса сдвигом готового шаблона в точку (cx, cy) от центра растра"""
+        dx, dy = self.ellipse_stencil(self.a, self.b)
+        self.plot_offsets(dx + cx, dy + cy)
+
+    @staticmethod
+    def conic_coefficients(a, b, angle=0.0, scale=1 << 16):
+        """Целые коэффициенты неравенства A*x^2 + B*x*y + C*y^2 <= F для эллипса,
+        повернутого на angle радиан (для angle=0 коэффициенты точные: b^2, 0, a^2, a^2*b^2)"""
+        if a <= 0 or b <= 0:
+            raise ValueError("Semi-axes must be positive")
+        a2 = a * a
+        b2 = b * b
+        if angle == 0:
+            return b2, 0, a2, a2 * b2
+        
+        # Коэффициенты поворота округляются один раз, дальше работает только целочисленная арифметика
+        c = math.cos(angle)
+        s = math.sin(angle)
+        A = round(scale * (b2 * c * c + a2 * s * s))
+        B = round(scale * 2 * (b2 - a2) * c * s)
+        C = round(scale * (b2 * s * s + a2 * c * c))
+        return A, B, C, scale * a2 * b2
+
+    def conic_spans(self, a, b, angle=0.0):
+        """Горизонтальные отрезки (y, x0, x1) закрашенного эллипса относительно его центра.
+        
+        Для каждой строки левая и правая границы - корни квадратного уравнения по x,
+        дискриминант обновляется приращениями и извлекается целочисленным isqrt,
+        поэтому работа пропорциональна высоте эллипса, а не площади.
+        """
+        A, B, C, F = self.conic_coefficients(a, b, angle)
+        # Дискриминант строки: disc(y) = K*y^2 + 4*A*F, K = B^2 - 4*A*C < 0
+        K = B * B - 4 * A * C
+        y_max = math.isqrt(4 * A * F // -K)
+        two_a = 2 * A
+        
+        ys = np.arange(-y_max, y_max + 1)
+        x0s = np.empty(ys.size, dtype=np.int64)
+        x1s = np.empty(ys.size, dtype=np.int64)
+        
+        y = -y_max
+        disc = K * y * y + 4 * A * F
+        for i in range(ys.size):
+            root = math.isqrt(disc)
+            # floor((-B*y + sqrt(disc)) / 2A) совпадает с floor((-B*y + isqrt(disc)) / 2A)
+            x0s[i] = -((B * y + root) // two_a)
+            x1s[i] = (root - B * y) // two_a
+            disc += K * (2 * y + 1)
+            y += 1
+        
+        # Строки без целых x внутри (у очень узких эллипсов) отбрасываем
+        keep = x0s <= x1s
+        return ys[keep], x0s[keep], x1s[keep]
+
+    @staticmethod
+    def outline_runs(ys, x0s, x1s):
+        """Контур закрашенной фигуры: в каждой строке остаются только крайние участки,
+        которые дотягиваются до границ соседних строк (контур получается 8-связным)"""
+        ys, x0s, x1s = np.asarray(ys), np.asarray(x0s), np.asarray(x1s)
+        if ys.size == 0:
+            return ys, x0s, x1s
+        
+        # Соседние строки; отсутствующий сосед заставляет выводить всю строку
+        has_up = np.r_[False, ys[1:] == ys[:-1] + 1]
+        has_down = np.r_[ys[:-1] + 1 == ys[1:], False]
+        up_x0 = np.where(has_up, np.r_[0, x0s[:-1]], x1s + 1)
+        up_x1 = np.where(has_up, np.r_[0, x1s[:-1]], x0s - 1)
+        down_x0 = np.where(has_down, np.r_[x0s[1:], 0], x1s + 1)
+        down_x1 = np.where(has_down, np.r_[x1s[1:], 0], x0s - 1)
+        
+        left_end = np.clip(np.maximum(up_x0, down_x0) - 1, x0s, x1s)
+        right_start = np.clip(np.minimum(up_x1, down_x1) + 1, x0s, x1s)
+        # Правый участок не должен повторять пиксели левого
+        right_start = np.maximum(right_start, left_end + 1)
+        right = right_start <= x1s
+        return (np.concatenate([ys, ys[right]]),
+                np.concatenate([x0s, right_start[right]]),
+                np.concatenate([left_end, x1s[right]]))
+
+    @staticmethod
+    def expand_spans(ys, x0s, x1s):
+        """Разворачивает отрезки (y, x0, x1) в массивы координат пикселей"""
+        lengths = x1s - x0s + 1
+        first = np.cumsum(lengths) - lengths
+        xs = np.arange(lengths.sum()) - np.repeat(first - x0s, lengths)
+        return xs, np.repeat(ys, lengths)
+
+    @staticmethod
+    def arc_mask(xs, ys, a, b, angle, start, end):
+        """Пиксели, параметрический угол t которых (x = a*cos t, y = b*sin t
+        в системе осей эллипса) лежит в дуге [start, end]"""
+        c = math.cos(angle)
+        s = math.sin(angle)
+        u = xs * c + ys * s
+        v = ys * c - xs * s
+        t = np.arctan2(v * a, u * b)
+        sweep = end - start
+        if sweep >= 2 * math.pi:
+            return np.ones(t.shape, dtype=bool)
+        return np.mod(t - start, 2 * math.pi) <= np.mod(sweep, 2 * math.pi)
+
+    def integer_ellipse(self, cx=0, cy=0, a=None, b=None, angle=0.0, filled=False, arc=None):
+        """Эллипс с центром (cx, cy) от центра растра, повернутый на angle радиан.
+        
+        filled=True закрашивает эллипс отрезками строк, arc=(start, end) оставляет
+        только дугу (или сектор для закрашенного эллипса) между параметрическими углами.
+        """
+        a = self.a if a is None else a
+        b = self.b if b is None else b
+        ys, x0s, x1s = self.conic_spans(a, b, angle)
+        
+        if filled and arc is None:
+            center = self.raster_size // 2
+            self.buffer.set_spans(ys + cy + center, x0s + cx + center, x1s + cx + center)
+            return
+        
+        if not filled:
+            ys, x0s, x1s = self.outline_runs(ys, x0s, x1s)
+        xs, ys = self.expand_spans(ys, x0s, x1s)
+        if arc is not None:
+            keep = self.arc_mask(xs, ys, a, b, angle, *arc)
+            xs, ys = xs[keep], ys[keep]
+        self.plot_offsets(xs + cx, ys + cy)
 
     def plot_points(self, x, y):
-        """Отображение точек с учетом симметрии эллипса"""
-        points = [
-            (x, y), (-x, y), (x, -y), (-x, -y)
-        ]
+        """Отображение точек с учетом симметрии эллипса (x, y - числа или массивы)"""
+        px = np.concatenate([np.ravel(x), -np.ravel(x), np.ravel(x), -np.ravel(x)])
+        py = np.concatenate([np.ravel(y), np.ravel(y), -np.ravel(y), -np.ravel(y)])
+        self.plot_offsets(px, py)
+
+    def plot_offsets(self, px, py):
+        """Запись точек, заданных относительно центра растра"""
+        # Смещаем координаты к центру растра
+        shifted_x = px + self.raster_size//2
+        shifted_y = py + self.raster_size//2
         
-        for px, py in points:
-            # Смещаем координаты к центру растра
-            shifted_x = px + self.raster_size//2
-            shifted_y = py + self.raster_size//2
-            
-            if 0 <= shifted_x < self.raster_size and 0 <= shifted_y < self.raster_size:
-                self.buffer.set_pixel(shifted_x, shifted_y, 1)
-                self.points.append((px, py))
+        inside = (shifted_x >= 0) & (shifted_x < self.raster_size) & \
+                 (shifted_y >= 0) & (shifted_y < self.raster_size)
+        self.buffer.set_pixels(shifted_x[inside], shifted_y[inside], 1)
+        self.points.extend(zip(px[inside].tolist(), py[inside].tolist()))
 
     def benchmark(self):
         """Тестирование производительности"""
@@ -165,17 +360,46 @@ class EllipseRasterizer:
             self.clear_buffer()
             self.subpixel_ellipse()
             
+        def test_cached():
+            self.clear_buffer()
+            self.cached_ellipse()
+            
+        def test_integer():
+            self.clear_buffer()
+            self.integer_ellipse(angle=math.pi / 6)
+            
+        def test_filled():
+            self.clear_buffer()
+            self.integer_ellipse(angle=math.pi / 6, filled=True)
+            
+        def test_midpoint_filled():
+            self.clear_buffer()
+            self.filled_ellipse()
+            
         bresenham_time = Benchmark.measure_time(test_bresenham)
         subpixel_time = Benchmark.measure_time(test_subpixel)
+        cached_time = Benchmark.measure_time(test_cached)
+        integer_time = Benchmark.measure_time(test_integer)
+        filled_time = Benchmark.measure_time(test_filled)
+        midpoint_filled_time = Benchmark.measure_time(test_midpoint_filled)
         
         # Выводим результаты в консоль на английском
         print("\nBenchmark results:")
         print(f"Bresenham: {bresenham_time*1000:.6f} ms")
         print(f"Subpixel: {subpixel_time*1000:.6f} ms")
+        print(f"Cached stencil: {cached_time*1000:.6f} ms")
+        print(f"Integer (rotated): {integer_time*1000:.6f} ms")
+        print(f"Integer (filled): {filled_time*1000:.6f} ms")
+        print(f"Bresenham (filled): {midpoint_filled_time*1000:.6f} ms")
+        print(f"Stencil cache: {self.stencils.stats()}")
                 
         return {
             "bresenham": bresenham_time,
-            "subpixel": subpixel_time
+            "subpixel": subpixel_time,
+            "cached": cached_time,
+            "integer": integer_time,
+            "filled": filled_time,
+            "bresenham_filled": midpoint_filled_time
         }
 
     def draw(self):
@@ -203,13 +427,22 @@ class EllipseRasterizer:
                     pygame.draw.rect(self.screen, (50, 50, 50), rect, 1)
         
         # Отображение информации
+        algorithm_names = {
+            "bresenham": "Брезенхем",
+            "subpixel": "Полупиксельный",
+            "integer": "Целочисленный"
+        }
         info_text = [
-            f"Алгоритм: {'Брезенхем' if self.current_algorithm == 'bresenham' else 'Полупиксельный'}",
+            f"Алгоритм: {algorithm_names[self.current_algorithm]}",
             f"Размер растра: {self.raster_size}x{self.raster_size}",
             f"Полуоси: a={self.a}, b={self.b}",
+            f"Поворот: {math.degrees(self.angle):.0f}°, заливка: {'да' if self.filled else 'нет'}, "
+            f"дуга: {'да' if self.arc else 'нет'}",
             "Управление:",
             "1 - Алгоритм Брезенхема",
             "2 - Полупиксельный алгоритм",
+            "3 - Целочисленный алгоритм",
+            "R/F/A - Поворот/Заливка/Дуга",
             "B - Тест производительности",
             "Точки в формате (строка-колонка):"
         ]
@@ -225,17 +458,26 @@ class EllipseRasterizer:
             for i, text in enumerate(points_text[:20]):  # Ограничивм вывод 20 точками
                 self.ui.draw_text(self.screen, text, (800, y_offset + i * 20), (200, 200, 200))
 
+    def redraw(self):
+        """Перерисовка эллипса текущим алгоритмом"""
+        self.clear_buffer()
+        if self.current_algorithm == "bresenham":
+            if self.filled:
+                self.filled_ellipse()
+            else:
+                self.cached_ellipse()
+        elif self.current_algorithm == "subpixel":
+            self.subpixel_ellipse()
+        else:
+            self.integer_ellipse(angle=self.angle, filled=self.filled, arc=self.arc)
+
     def run(self):
         """Основной цикл программы"""
         clock = pygame.time.Clock()
         running = True
         
         # Начальная отрисовка
-        self.clear_buffer()
-        if self.current_algorithm == "bresenham":
-            self.bresenham_ellipse()
-        else:
-            self.subpixel_ellipse()
+        self.redraw()
         
         while running:
             for event in pygame.event.get():
@@ -244,12 +486,22 @@ class EllipseRasterizer:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_1:
                         self.current_algorithm = "bresenham"
-                        self.clear_buffer()
-                        self.bresenham_ellipse()
+                        self.redraw()
                     elif event.key == pygame.K_2:
                         self.current_algorithm = "subpixel"
-                        self.clear_buffer()
-                        self.subpixel_ellipse()
+                        self.redraw()
+                    elif event.key == pygame.K_3:
+                        self.current_algorithm = "integer"
+                        self.redraw()
+                    elif event.key == pygame.K_r:
+                        self.angle = (self.angle + math.pi / 12) % (2 * math.pi)
+                        self.redraw()
+                    elif event.key == pygame.K_f:
+                        self.filled = not self.filled
+                        self.redraw()
+                    elif event.key == pygame.K_a:
+                        self.arc = None if self.arc else (0.0, 1.5 * math.pi)
+                        self.redraw()
                     elif event.key == pygame.K_b:
                         # Запуск теста производительности
                         results = self.benchmark()
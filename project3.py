@@ -4,18 +4,23 @@
 Реализация и сравнение алгоритмов:
 1. Цифровой дифференциальный анализатор (ЦДА)
 2. Алгоритм Брезенхема
+3. Алгоритм Брезенхема по сериям (горизонтальные/вертикальные серии пикселей)
+4. Алгоритм Ву (сглаженный отрезок с дробным покрытием пикселей)
 
 Особенности:
-- Размер растра: 32x32
+- Размер растра: 32x32 (настраивается, вплоть до 4096x4096)
 - Визуализация процесса построения
 - Два режима работы: демо и тест
 - Отображение координат точек
 - Сравнение производительности
+- Пакетная растеризация тысяч отрезков средствами NumPy
 - Интерактивное управление
 
 Управление:
 - 1 - Алгоритм ЦДА
 - 2 - Алгоритм Брезенхема
+- 3 - Алгоритм Брезенхема по сериям
+- 4 - Алгоритм Ву (сглаживание)
 - Пробел - Переключение режима
 - C - Показать/скрыть координаты
 - B - Тест производительности
@@ -29,29 +34,121 @@ import pygame
 import random
 import math
 import time
+import numpy as np
 from utils.opengl_utils import OpenGLUtils
+from utils.graphics import LineRasterizer, TouchedPixels
 
 class LineDrawer:
-    def __init__(self):
-        self.width = 32
-        self.height = 32
+    def __init__(self, width=32, height=32, track_pixels=True):
+        self.width = width
+        self.height = height
         self.scale = 20  # Размер одного пикселя на экране
-        self.center = (16, 16)  # Центр координат
-        self.buffer = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.active_pixels = []  # Для хранения активированных пикселей
+        self.center = (width // 2, height // 2)  # Центр координат
+        # Растр покрытия: 1 для обычных алгоритмов, доли 0..1 для алгоритма Ву
+        self.buffer = np.zeros((height, width), dtype=np.float32)
+        
+        # Пиксели, записанные с последней очистки (active_pixels строится по ним)
+        self.touched = TouchedPixels(width, track_pixels)
         
     def clear_buffer(self):
-        self.buffer = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.active_pixels = []
+        """Очистка за время, пропорциональное числу записанных пикселей"""
+        self.touched.clear(self.buffer)
+
+    @property
+    def active_pixels(self):
+        """Множество активированных пикселей (x, y)"""
+        return self.touched.active_pixels
 
-    def set_pixel(self, x, y):
+    def set_pixel(self, x, y, value=1):
         # Преобразование координат в координаты растра
         screen_x = int(x + self.center[0])
         screen_y = int(y + self.center[1])
         
         if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
-            self.buffer[screen_y][screen_x] = 1
-            self.active_pixels.append((screen_x, screen_y))
+            # Покрытие пересекающихся отрезков объединяется по максимуму
+            if value > self.buffer[screen_y, screen_x]:
+                self.buffer[screen_y, screen_x] = value
+            self.touched.add_pixel(screen_x, screen_y)
+
+    def set_pixels(self, xs, ys, values=1):
+        """Пакетная запись пикселей из массивов координат"""
+        # Как и в set_pixel, смещение добавляется до отбрасывания дробной части
+        screen_x = (np.asarray(xs) + self.center[0]).astype(np.intp)
+        screen_y = (np.asarray(ys) + self.center[1]).astype(np.intp)
+        
+        inside = (screen_x >= 0) & (screen_x < self.width) & \
+                 (screen_y >= 0) & (screen_y < self.height)
+        screen_x, screen_y = screen_x[inside], screen_y[inside]
+        if np.ndim(values) == 0 and values >= 1:
+            self.buffer[screen_y, screen_x] = values
+        else:
+            values = np.broadcast_to(values, inside.shape)[inside]
+            np.maximum.at(self.buffer, (screen_y, screen_x), values)
+        self.touched.add_pixels(screen_x, screen_y)
+
+    def line_pixels(self, segments, algorithm="bresenham"):
+        """Пакетная растеризация отрезков (N, 4): xs, ys пикселей и индекс отрезка"""
+        return LineRasterizer.line_pixels(segments, algorithm)
+
+    def wu_pixels(self, segments):
+        """Пакетный алгоритм Ву: segments - массив (N, 4) строк [x1, y1, x2, y2].
+
+        Возвращает массивы xs, ys, покрытие пикселей и индекс отрезка.
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        x1, y1, x2, y2 = segments.T
+        
+        # Сводим к пологому отрезку слева направо
+        steep = np.abs(y2 - y1) > np.abs(x2 - x1)
+        x1, y1 = np.where(steep, y1, x1), np.where(steep, x1, y1)
+        x2, y2 = np.where(steep, y2, x2), np.where(steep, x2, y2)
+        backwards = x1 > x2
+        x1, x2 = np.where(backwards, x2, x1), np.where(backwards, x1, x2)
+        y1, y2 = np.where(backwards, y2, y1), np.where(backwards, y1, y2)
+        
+        dx = x2 - x1
+        gradient = np.where(dx == 0, 1.0, (y2 - y1) / np.where(dx == 0, 1.0, dx))
+        
+        # Концевые точки с учетом доли покрытия по x
+        x_end1 = np.floor(x1 + 0.5)
+        y_end1 = y1 + gradient * (x_end1 - x1)
+        gap1 = 1 - (x1 + 0.5 - np.floor(x1 + 0.5))
+        x_end2 = np.floor(x2 + 0.5)
+        y_end2 = y2 + gradient * (x_end2 - x2)
+        gap2 = x2 + 0.5 - np.floor(x2 + 0.5)
+        
+        # Внутренние столбцы разворачиваем в плоский массив
+        counts = np.maximum(x_end2 - x_end1 - 1, 0).astype(np.intp)
+        segment_index = np.repeat(np.arange(len(segments)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        inter_y = y_end1[segment_index] + gradient[segment_index] * k
+        
+        columns = np.concatenate([x_end1, x_end2, x_end1[segment_index] + k])
+        y_values = np.concatenate([y_end1, y_end2, inter_y])
+        gaps = np.concatenate([gap1, gap2, np.ones_like(inter_y)])
+        index = np.concatenate([np.arange(len(segments)), np.arange(len(segments)), segment_index])
+        
+        # Каждый столбец дает два пикселя с покрытием (1 - frac) и frac
+        rows = np.floor(y_values)
+        frac = y_values - rows
+        columns = np.concatenate([columns, columns])
+        rows = np.concatenate([rows, rows + 1])
+        coverage = np.concatenate([(1 - frac) * gaps, frac * gaps])
+        index = np.concatenate([index, index])
+        
+        steep = steep[index]
+        xs = np.where(steep, rows, columns).astype(np.int64)
+        ys = np.where(steep, columns, rows).astype(np.int64)
+        return xs, ys, coverage, index
+
+    def draw_lines(self, segments, algorithm="bresenham"):
+        """Пакетная отрисовка отрезков в буфер"""
+        if algorithm == "wu":
+            xs, ys, coverage, _ = self.wu_pixels(segments)
+            self.set_pixels(xs, ys, coverage)
+            return
+        xs, ys, _ = self.line_pixels(segments, algorithm)
+        self.set_pixels(xs, ys)
 
     def dda_line(self, x1, y1, x2, y2):
         dx = x2 - x1
@@ -103,6 +200,106 @@ class LineDrawer:
                 
         self.set_pixel(x, y)
 
+    def wu_line(self, x1, y1, x2, y2):
+        """Алгоритм Ву: сглаженный отрезок с дробным покрытием пикселей"""
+        steep = abs(y2 - y1) > abs(x2 - x1)
+        if steep:
+            x1, y1, x2, y2 = y1, x1, y2, x2
+        if x1 > x2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+            
+        def plot(x, y, value):
+            if steep:
+                self.set_pixel(y, x, value)
+            else:
+                self.set_pixel(x, y, value)
+        
+        dx = x2 - x1
+        dy = y2 - y1
+        gradient = dy / dx if dx != 0 else 1.0
+        
+        # Первая концевая точка
+        x_end = math.floor(x1 + 0.5)
+        y_end = y1 + gradient * (x_end - x1)
+        gap = 1 - (x1 + 0.5 - math.floor(x1 + 0.5))
+        row = math.floor(y_end)
+        plot(x_end, row, (1 - (y_end - row)) * gap)
+        plot(x_end, row + 1, (y_end - row) * gap)
+        x_start = x_end
+        inter_y = y_end + gradient
+        
+        # Вторая концевая точка
+        x_end = math.floor(x2 + 0.5)
+        y_end = y2 + gradient * (x_end - x2)
+        gap = x2 + 0.5 - math.floor(x2 + 0.5)
+        row = math.floor(y_end)
+        plot(x_end, row, (1 - (y_end - row)) * gap)
+        plot(x_end, row + 1, (y_end - row) * gap)
+        
+        # Внутренние столбцы: по два пикселя с долями покрытия
+        for x in range(x_start + 1, x_end):
+            row = math.floor(inter_y)
+            plot(x, row, 1 - (inter_y - row))
+            plot(x, row + 1, inter_y - row)
+            inter_y += gradient
+
+    def set_run(self, x1, y1, x2, y2):
+        """Запись горизонтальной или вертикальной серии пикселей срезом"""
+        if y1 == y2:
+            screen_y = y1 + self.center[1]
+            if not 0 <= screen_y < self.height:
+                return
+            start = max(min(x1, x2) + self.center[0], 0)
+            end = min(max(x1, x2) + self.center[0], self.width - 1)
+            if start > end:
+                return
+            self.buffer[screen_y, start:end + 1] = 1
+            self.touched.add_row(screen_y, start, end + 1)
+        else:
+            screen_x = x1 + self.center[0]
+            if not 0 <= screen_x < self.width:
+                return
+            start = max(min(y1, y2) + self.center[1], 0)
+            end = min(max(y1, y2) + self.center[1], self.height - 1)
+            if start > end:
+                return
+            self.buffer[start:end + 1, screen_x] = 1
+            self.touched.add_column(screen_x, start, end + 1)
+
+    def bresenham_runs(self, x1, y1, x2, y2, span_sink=None):
+        """Алгоритм Брезенхема по сериям.
+
+        За одну итерацию вычисляется целая серия пикселей с одинаковой координатой
+        по неглавной оси, поэтому работа на Python пропорциональна числу серий,
+        а не числу пикселей. Серии (x1, y1, x2, y2) передаются в span_sink
+        (по умолчанию - запись в буфер); пиксели совпадают с bresenham_line.
+        """
+        if span_sink is None:
+            span_sink = self.set_run
+            
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+        step_x = 1 if x2 > x1 else -1
+        step_y = 1 if y2 > y1 else -1
+        
+        # Как и в bresenham_line, при dx == dy главной считается ось y
+        x_major = dx > dy
+        major, minor = (dx, dy) if x_major else (dy, dx)
+        
+        start = 0  # Номер первого шага серии по главной оси
+        k = 0      # Смещение серии по неглавной оси
+        while start <= major:
+            # Последний шаг, на котором ошибка еще не переводит на следующую серию
+            end = major if minor == 0 else min(major, (2 * k + 1) * major // (2 * minor))
+            if x_major:
+                y = y1 + k * step_y
+                span_sink(x1 + start * step_x, y, x1 + end * step_x, y)
+            else:
+                x = x1 + k * step_x
+                span_sink(x, y1 + start * step_y, x, y1 + end * step_y)
+            start = end + 1
+            k += 1
+
     def draw_circle_points(self, center, points=16):
         result = []
         for i in range(points):
@@ -123,6 +320,10 @@ class LineDrawer:
             start_time = time.time()
             if algorithm == "dda":
                 self.dda_line(x1, y1, x2, y2)
+            elif algorithm == "runs":
+                self.bresenham_runs(x1, y1, x2, y2)
+            elif algorithm == "wu":
+                self.wu_line(x1, y1, x2, y2)
             else:
                 self.bresenham_line(x1, y1, x2, y2)
             total_time += time.time() - start_time
@@ -131,6 +332,18 @@ class LineDrawer:
             
         return total_time / iterations
 
+    def benchmark_batch(self, algorithm, num_lines=10000):
+        """Время растеризации одного отрезка в пакетном режиме"""
+        segments = np.random.randint(-15, 16, size=(num_lines, 4))
+        
+        # Как и в benchmark, учитывается запись в буфер, но не его очистка
+        start_time = time.time()
+        self.draw_lines(segments, algorithm)
+        total_time = time.time() - start_time
+        self.clear_buffer()
+        
+        return total_time / num_lines
+
 def main():
     pygame.init()
     window_size = (800, 800)
@@ -141,7 +354,8 @@ def main():
     clock = pygame.time.Clock()
     
     # Флаги для выбора алгоритма и режима
-    current_algorithm = "dda"  # или "bresenham"
+    current_algorithm = "dda"  # или "bresenham", "runs"
+    algorithm_names = {"dda": "ЦДА", "bresenham": "Брезенхем", "runs": "Брезенхем (серии)", "wu": "Ву"}
     demo_mode = True  # True - демо с кругом, False - тестовая линия
     show_coordinates = False
     center_x, center_y = 0, 0
@@ -160,6 +374,10 @@ def main():
                     current_algorithm = "dda"
                 elif event.key == pygame.K_2:
                     current_algorithm = "bresenham"
+                elif event.key == pygame.K_3:
+                    current_algorithm = "runs"
+                elif event.key == pygame.K_4:
+                    current_algorithm = "wu"
                 elif event.key == pygame.K_SPACE:
                     demo_mode = not demo_mode
                 elif event.key == pygame.K_c:
@@ -168,8 +386,18 @@ def main():
                     # Запуск бенчмарка
                     dda_time = drawer.benchmark("dda")
                     bresenham_time = drawer.benchmark("bresenham")
+                    runs_time = drawer.benchmark("runs")
                     print(f"DDA average time: {dda_time*1000:.6f} ms")
                     print(f"Bresenham average time: {bresenham_time*1000:.6f} ms")
+                    print(f"Run-slice Bresenham average time: {runs_time*1000:.6f} ms")
+                    wu_time = drawer.benchmark("wu")
+                    print(f"Wu average time: {wu_time*1000:.6f} ms")
+                    dda_batch_time = drawer.benchmark_batch("dda")
+                    bresenham_batch_time = drawer.benchmark_batch("bresenham")
+                    wu_batch_time = drawer.benchmark_batch("wu")
+                    print(f"DDA batch time per line: {dda_batch_time*1000:.6f} ms")
+                    print(f"Bresenham batch time per line: {bresenham_batch_time*1000:.6f} ms")
+                    print(f"Wu batch time per line: {wu_batch_time*1000:.6f} ms")
                     
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # ЛКМ
@@ -179,20 +407,23 @@ def main():
         
         drawer.clear_buffer()
         
+        if current_algorithm == "dda":
+            draw_line = drawer.dda_line
+        elif current_algorithm == "runs":
+            draw_line = drawer.bresenham_runs
+        elif current_algorithm == "wu":
+            draw_line = drawer.wu_line
+        else:
+            draw_line = drawer.bresenham_line
+        
         if demo_mode:
             # Рисуем 16 линий из центра к точкам окружности
             points = drawer.draw_circle_points((center_x, center_y))
             for point in points:
-                if current_algorithm == "dda":
-                    drawer.dda_line(center_x, center_y, center_x + point[0], center_y + point[1])
-                else:
-                    drawer.bresenham_line(center_x, center_y, center_x + point[0], center_y + point[1])
+                draw_line(center_x, center_y, center_x + point[0], center_y + point[1])
         else:
             # Рисуем тестовую линию (0,0) -> (-8,-3)
-            if current_algorithm == "dda":
-                drawer.dda_line(0, 0, -8, -3)
-            else:
-                drawer.bresenham_line(0, 0, -8, -3)
+            draw_line(0, 0, -8, -3)
         
         # Отрисовка
         screen.fill((0, 0, 0))
@@ -207,15 +438,17 @@ def main():
                     drawer.scale - 1
                 )
                 if drawer.buffer[y][x]:
-                    pygame.draw.rect(screen, (255, 255, 255), rect)
+                    # Для алгоритма Ву яркость пропорциональна покрытию
+                    color = int(drawer.buffer[y][x] * 255)
+                    pygame.draw.rect(screen, (color, color, color), rect)
                 else:
                     pygame.draw.rect(screen, (50, 50, 50), rect, 1)
         
         # Отображение минимальной информации
         info_text = [
-            f"Алгоритм: {'ЦДА' if current_algorithm == 'dda' else 'Брезенхем'}",
+            f"Алгоритм: {algorithm_names[current_algorithm]}",
             f"Режим: {'Демо' if demo_mode else 'Тест'}",
-            f"Растр: 32x32"
+            f"Растр: {drawer.width}x{drawer.height}"
         ]
         
         # Смещаем текст в левый верхний угол и уменьшаем шрифт
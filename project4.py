@@ -4,18 +4,24 @@
 Реализация и сравнение алгоритмов:
 1. Алгоритм Брезенхема для окружности
 2. Метод вписанного многоугольника
+3. Векторизованный алгоритм Брезенхема (октант в замкнутой форме, пакет окружностей)
+4. Закрашенный круг отрезками строк по контуру Брезенхема
 
 Особенности:
-- Размер растра: 32x32
+- Размер растра: 32x32 (настраивается, вплоть до 4096x4096)
 - Радиус окружности: 15 единиц
 - Настраиваемое количество сторон для многоугольника
 - Визуализация процесса построения
 - Сравнение точности аппроксимации
+- Кэш тригонометрических таблиц для многоугольников
+- LRU-кэш готовых шаблонов окружностей (по радиусу и алгоритму)
 - Интерактивное управление
 
 Управление:
 - 1 - Алгоритм Брезенхема
 - 2 - Метод многоугольника
+- V - Векторизованный алгоритм Брезенхема
+- F - Закрашенный круг
 - 4,8,6,3,7 - Количество сторон (4,8,16,32,128)
 - C - Показать/скрыть координаты
 - B - Тест производительности
@@ -29,31 +35,60 @@ import pygame
 import math
 import time
 import random
+import numpy as np
 from utils.opengl_utils import OpenGLUtils
 from utils.ui import UIManager
+from utils.graphics import LineRasterizer, StencilCache, TouchedPixels
 
 class CircleDrawer:
-    def __init__(self):
-        self.width = 32
-        self.height = 32
+    def __init__(self, width=32, height=32, track_pixels=True):
+        self.width = width
+        self.height = height
         self.scale = 20
-        self.center = (16, 16)
-        self.buffer = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.active_pixels = []
+        self.center = (width // 2, height // 2)
+        self.buffer = np.zeros((height, width), dtype=np.uint8)
+        
+        # Пиксели, записанные с последней очистки (active_pixels строится по ним)
+        self.touched = TouchedPixels(width, track_pixels)
+        
         self.radius = 15
         self.sides = 16  # Количество сторон для многоугольника
+        self.trig_cache = {}  # sides -> (cos, sin) вершин многоугольника
+        self.stencils = StencilCache()  # Готовые контуры: смещения пикселей от центра
         
     def clear_buffer(self):
-        self.buffer = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.active_pixels = []
+        """Очистка за время, пропорциональное числу записанных пикселей"""
+        self.touched.clear(self.buffer)
+
+    @property
+    def active_pixels(self):
+        """Множество активированных пикселей (x, y)"""
+        return self.touched.active_pixels
 
     def set_pixel(self, x, y):
         screen_x = int(x + self.center[0])
         screen_y = int(y + self.center[1])
         
         if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
-            self.buffer[screen_y][screen_x] = 1
-            self.active_pixels.append((screen_x, screen_y))
+            self.buffer[screen_y, screen_x] = 1
+            self.touched.add_pixel(screen_x, screen_y)
+
+    def set_pixels(self, xs, ys):
+        """Пакетная запись пикселей из массивов координат"""
+        # Как и в set_pixel, смещение добавляется до отбрасывания дробной части
+        screen_x = (np.asarray(xs) + self.center[0]).astype(np.intp)
+        screen_y = (np.asarray(ys) + self.center[1]).astype(np.intp)
+        
+        inside = (screen_x >= 0) & (screen_x < self.width) & \
+                 (screen_y >= 0) & (screen_y < self.height)
+        screen_x, screen_y = screen_x[inside], screen_y[inside]
+        self.buffer[screen_y, screen_x] = 1
+        self.touched.add_pixels(screen_x, screen_y)
+
+    def line_pixels(self, segments):
+        """Пакетный алгоритм Брезенхема для отрезков (N, 4), попиксельно как bresenham_line"""
+        xs, ys, _ = LineRasterizer.line_pixels(segments)
+        return xs, ys
 
     def bresenham_line(self, x1, y1, x2, y2):
         dx = abs(x2 - x1)
@@ -108,19 +143,155 @@ class CircleDrawer:
                 y -= 1
             x += 1
 
+    @staticmethod
+    def octant_points(radii):
+        """Октант окружностей Брезенхема в замкнутой форме.
+
+        Шаг с d = 3 - 2r оставляет y, пока (2y - 1)^2 + 4x^2 + 1 < 4r^2,
+        поэтому y(x) - наибольшее такое y, и его можно найти через isqrt.
+        Возвращает x, y и индекс окружности для каждой точки октанта.
+        """
+        radii = np.asarray(radii, dtype=np.int64).reshape(-1)
+        counts = (np.floor(radii / math.sqrt(2)) + 2).astype(np.intp)
+        circle_index = np.repeat(np.arange(len(radii)), counts)
+        x = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        
+        r = radii[circle_index]
+        q = 4 * r * r - 4 * x * x - 2
+        s = np.floor(np.sqrt(np.maximum(q, 0))).astype(np.int64)
+        # Поправка округления: s = isqrt(q)
+        s -= s * s > q
+        s += (s + 1) * (s + 1) <= q
+        s = np.where(q < 0, -1, s)
+        y = (s + 1) // 2
+        
+        # Цикл while x <= y: точки октанта образуют префикс по x
+        keep = x <= y
+        return x[keep], y[keep], circle_index[keep]
+
+    def circle_pixels(self, centers, radii):
+        """Пакетная растеризация окружностей: центры (N, 2) и радиусы (N,)"""
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        x, y, circle_index = self.octant_points(radii)
+        cx = centers[circle_index, 0]
+        cy = centers[circle_index, 1]
+        
+        # Отражаем октант во все восемь октантов
+        xs = np.concatenate([x, -x, x, -x, y, -y, y, -y]) + np.tile(cx, 8)
+        ys = np.concatenate([y, y, -y, -y, x, x, -x, -x]) + np.tile(cy, 8)
+        return xs, ys
+
+    def draw_circles(self, centers, radii):
+        """Пакетная отрисовка окружностей в буфер"""
+        xs, ys = self.circle_pixels(centers, radii)
+        self.set_pixels(xs, ys)
+
+    def vectorized_circle(self):
+        """Векторизованный аналог bresenham_circle"""
+        self.draw_circles([(0, 0)], [self.radius])
+
+    def circle_spans(self, radius=None):
+        """Отрезки строк (y, x0, x1) закрашенного круга относительно центра.
+
+        Полуширина строки y - наибольший x точки контура Брезенхема в этой строке,
+        поэтому заливка точно совпадает с контуром bresenham_circle.
+        """
+        radius = self.radius if radius is None else radius
+        x, y, _ = self.octant_points([radius])
+        
+        # Каждая точка октанта задает края двух строк: y (ширина x) и x (ширина y)
+        half = np.full(radius + 1, -1, dtype=np.int64)
+        np.maximum.at(half, y, x)
+        np.maximum.at(half, x, y)
+        
+        ys = np.arange(-radius, radius + 1)
+        half = half[np.abs(ys)]
+        return ys, -half, half
+
+    def fill_spans(self, ys, x0s, x1s):
+        """Заполнение отрезков строк [x0, x1] срезами (время пропорционально числу строк)"""
+        for y, x0, x1 in zip(np.asarray(ys).tolist(), np.asarray(x0s).tolist(),
+                             np.asarray(x1s).tolist()):
+            screen_y = y + self.center[1]
+            start = max(x0 + self.center[0], 0)
+            stop = min(x1 + self.center[0] + 1, self.width)
+            if not 0 <= screen_y < self.height or start >= stop:
+                continue
+            self.buffer[screen_y, start:stop] = 1
+            self.touched.add_row(screen_y, start, stop)
+
+    def filled_circle(self, cx=0, cy=0, radius=None):
+        """Закрашенный круг с центром (cx, cy)"""
+        ys, x0s, x1s = self.circle_spans(radius)
+        self.fill_spans(ys + cy, x0s + cx, x1s + cx)
+
+    def circle_stencil(self, method="bresenham", radius=None):
+        """Шаблон контура окружности из кэша (строится при первом обращении)"""
+        radius = self.radius if radius is None else radius
+        if method == "polygon":
+            key = (method, radius, self.sides)
+            def build():
+                x, y = self.polygon_vertices(self.sides, radius)
+                return self.line_pixels(np.stack([x, y, np.roll(x, -1), np.roll(y, -1)], axis=1))
+        else:
+            key = ("bresenham", radius)
+            def build():
+                return self.circle_pixels([(0, 0)], [radius])
+        return self.stencils.get(key, build)
+
+    def cached_circle(self, method="bresenham", cx=0, cy=0):
+        """Отрисовка окружности сдвигом готового шаблона в точку (cx, cy)"""
+        dx, dy = self.circle_stencil(method)
+        self.set_pixels(dx + cx, dy + cy)
+
+    def polygon_vertices(self, sides, radius=None):
+        """Вершины вписанного многоугольника по кэшированной таблице cos/sin"""
+        if sides not in self.trig_cache:
+            angles = 2 * np.pi * np.arange(sides) / sides
+            self.trig_cache[sides] = (np.cos(angles), np.sin(angles))
+        cos, sin = self.trig_cache[sides]
+        radius = self.radius if radius is None else radius
+        # astype усекает к нулю, как int() в исходной версии
+        return (radius * cos).astype(np.int64), (radius * sin).astype(np.int64)
+
     def polygon_circle(self, sides):
-        points = []
-        for i in range(sides):
-            angle = 2 * math.pi * i / sides
-            x = int(self.radius * math.cos(angle))
-            y = int(self.radius * math.sin(angle))
-            points.append((x, y))
-        
-        # Соединяем точки линиями
-        for i in range(sides):
-            x1, y1 = points[i]
-            x2, y2 = points[(i + 1) % sides]
-            self.bresenham_line(x1, y1, x2, y2)
+        x, y = self.polygon_vertices(sides)
+        
+        # Соединяем точки линиями одним пакетом
+        segments = np.stack([x, y, np.roll(x, -1), np.roll(y, -1)], axis=1)
+        self.set_pixels(*self.line_pixels(segments))
+
+    def benchmark(self, method, iterations=100):
+        """Тестирование производительности"""
+        total_time = 0
+        for _ in range(iterations):
+            start_time = time.time()
+            if method == "bresenham":
+                self.bresenham_circle()
+            elif method == "vectorized":
+                self.vectorized_circle()
+            elif method == "cached":
+                self.cached_circle()
+            elif method == "filled":
+                self.filled_circle()
+            else:
+                self.polygon_circle(self.sides)
+            total_time += time.time() - start_time
+            
+            self.clear_buffer()
+            
+        return total_time / iterations
+
+    def benchmark_batch(self, num_circles=1000, max_radius=15):
+        """Время растеризации одной окружности в пакетном режиме"""
+        centers = np.random.randint(-self.width // 2, self.width // 2, size=(num_circles, 2))
+        radii = np.random.randint(0, max_radius + 1, size=num_circles)
+        
+        start_time = time.time()
+        self.circle_pixels(centers, radii)
+        total_time = time.time() - start_time
+        
+        return total_time / num_circles
 
 def main():
     pygame.init()
@@ -132,7 +303,9 @@ def main():
     clock = pygame.time.Clock()
     ui = UIManager()
     
-    current_method = "bresenham"  # или "polygon"
+    current_method = "bresenham"  # или "polygon", "vectorized", "filled"
+    method_names = {"bresenham": "Брезенхем", "polygon": "Многоугольник", "vectorized": "Брезенхем (NumPy)",
+                    "filled": "Закрашенный круг"}
     show_coordinates = False
     
     font = pygame.font.Font(None, 20)
@@ -148,6 +321,16 @@ def main():
                     current_method = "bresenham"
                 elif event.key == pygame.K_2:
                     current_method = "polygon"
+                elif event.key == pygame.K_v:
+                    current_method = "vectorized"
+                elif event.key == pygame.K_f:
+                    current_method = "filled"
+                elif event.key == pygame.K_b:
+                    # Запуск бенчмарка
+                    for method in ("bresenham", "vectorized", "cached", "filled", "polygon"):
+                        print(f"{method} average time: {drawer.benchmark(method)*1000:.6f} ms")
+                    print(f"Batch time per circle: {drawer.benchmark_batch()*1000:.6f} ms")
+                    print(f"Stencil cache: {drawer.stencils.stats()}")
                 elif event.key == pygame.K_c:
                     show_coordinates = not show_coordinates
                 elif event.key in [pygame.K_4, pygame.K_8, pygame.K_6, pygame.K_3, pygame.K_6, pygame.K_7]:
@@ -161,10 +344,13 @@ def main():
         
         drawer.clear_buffer()
         
-        if current_method == "bresenham":
-            drawer.bresenham_circle()
+        if current_method == "vectorized":
+            drawer.vectorized_circle()
+        elif current_method == "filled":
+            drawer.filled_circle()
         else:
-            drawer.polygon_circle(drawer.sides)
+            # Контур не меняется между кадрами, поэтому берем его из кэша шаблонов
+            drawer.cached_circle(current_method)
         
         # Отрисовка
         screen.fill((0, 0, 0))
@@ -185,10 +371,11 @@ def main():
         
         # Отображение информации через UIManager
         info_text = [
-            f"Метод: {'Брезенхем' if current_method == 'bresenham' else 'Многоугольник'}",
-            f"Растр: 32x32",
+            f"Метод: {method_names[current_method]}",
+            f"Растр: {drawer.width}x{drawer.height}",
             f"Радиус: {drawer.radius}",
-            f"Стороны: {drawer.sides if current_method == 'polygon' else 'N/A'}"
+            f"Стороны: {drawer.sides if current_method == 'polygon' else 'N/A'}",
+            f"Кэш шаблонов: {drawer.stencils.hits} попаданий, {drawer.stencils.misses} промахов"
         ]
         
         ui.draw_text_list(screen, info_text, 10, 10, 20)
@@ -2,8 +2,10 @@
 Проект 5: Алгоритмы отсечения отрезков
 
 Реализация алгоритмов:
-1. Алгоритм Сазерленда-Коэна
+1. Алгоритм Сазерленда-Коэна (для одного отрезка и для массива отрезков)
 2. Алгоритм разбиения средней точкой
+3. Параметрический алгоритм Лианга-Барски (для одного отрезка и для массива отрезков)
+4. Итеративное разбиение средней точкой с заданной точностью (без рекурсии, пакетный вариант)
 
 Особенности:
 - Отсечение отрезков по двумерному прямоугольному окну
@@ -11,10 +13,13 @@
 - Визуализация процесса отсечения
 - Интерактивное добавление отрезков
 - Сравнение эффективности алгоритмов
+- Пакетное отсечение массивов отрезков на NumPy
 
 Управление:
 - 1 - Алгоритм Сазерленда-Коэна
 - 2 - Алгоритм разбиения средней точкой
+- 3 - Алгоритм Лианга-Барски
+- 4 - Итеративное разбиение средней точкой
 - I - Показать/скрыть информацию
 - B - Тест производительности
 - ЛКМ - Добавить отрезок
@@ -25,6 +30,7 @@
 
 import pygame
 import random
+import numpy as np
 import math
 import time
 from utils.geometry import GeometryUtils
@@ -50,6 +56,9 @@ class LineClipper:
         
         # Окно отсечения
         self.set_window(-100, -100, 100, 100)
+        
+        # Точность итеративного разбиения средней точкой
+        self.tolerance = 1e-3
 
     def get_circle_points(self, radius=150, num_points=16):
         """Генерация точек по окружности"""
@@ -128,6 +137,126 @@ class LineClipper:
 
         return accept, (x1, y1, x2, y2) if accept else None
 
+    def get_codes(self, xs, ys):
+        """Коды точек для массивов координат (те же биты, что и в get_code)"""
+        xmin, ymin, xmax, ymax = self.window
+        codes = np.where(xs < xmin, 1, np.where(xs > xmax, 2, 0))
+        codes |= np.where(ys < ymin, 4, np.where(ys > ymax, 8, 0))
+        return codes
+
+    def cohen_sutherland_batch(self, segments):
+        """Алгоритм Сазерленда-Коэна для массива отрезков (N, 4).
+
+        Тривиально видимые и невидимые отрезки отбираются масками сразу,
+        шаг пересечения повторяется только для неопределенных отрезков.
+        Возвращает флаги видимости (N,) и отсеченные координаты (N, 4),
+        для невидимых отрезков координаты равны nan.
+        """
+        clipped = np.array(segments, dtype=np.float64).reshape(-1, 4)
+        accepted = np.zeros(len(clipped), dtype=bool)
+        xmin, ymin, xmax, ymax = self.window
+        
+        x1, y1, x2, y2 = clipped.T
+        code1 = self.get_codes(x1, y1)
+        code2 = self.get_codes(x2, y2)
+        active = np.arange(len(clipped))
+        
+        while active.size:
+            c1, c2 = code1[active], code2[active]
+            accept = (c1 | c2) == 0
+            reject = (c1 & c2) != 0
+            accepted[active[accept]] = True
+            undecided = ~(accept | reject)
+            active, c1 = active[undecided], c1[undecided]
+            if not active.size:
+                break
+            
+            # Отсекаем первый конец, если он снаружи, иначе второй
+            first = c1 != 0
+            code = np.where(first, c1, code2[active])
+            ax, ay = x1[active], y1[active]
+            bx, by = x2[active], y2[active]
+            
+            # Та же очередность границ и те же формулы, что и в cohen_sutherland
+            left = (code & 1) != 0
+            right = ~left & ((code & 2) != 0)
+            bottom = ~left & ~right & ((code & 4) != 0)
+            vertical = left | right
+            edge_x = np.where(left, xmin, xmax)
+            edge_y = np.where(bottom, ymin, ymax)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x = np.where(vertical, edge_x, ax + (bx - ax) * (edge_y - ay) / (by - ay))
+                y = np.where(vertical, ay + (by - ay) * (edge_x - ax) / (bx - ax), edge_y)
+            
+            ends_1, ends_2 = active[first], active[~first]
+            x1[ends_1], y1[ends_1] = x[first], y[first]
+            x2[ends_2], y2[ends_2] = x[~first], y[~first]
+            code1[ends_1] = self.get_codes(x1[ends_1], y1[ends_1])
+            code2[ends_2] = self.get_codes(x2[ends_2], y2[ends_2])
+        
+        clipped[~accepted] = np.nan
+        return accepted, clipped
+
+    def liang_barsky(self, x1, y1, x2, y2):
+        """Алгоритм Лианга-Барски: отсечение по параметру t без вычисления кодов"""
+        dx = x2 - x1
+        dy = y2 - y1
+        t_enter = 0.0
+        t_exit = 1.0
+        
+        # Для каждой границы: p*t <= q, p < 0 - вход, p > 0 - выход
+        for p, q in ((-dx, x1 - self.window[0]), (dx, self.window[2] - x1),
+                     (-dy, y1 - self.window[1]), (dy, self.window[3] - y1)):
+            if p == 0:
+                if q < 0:  # Параллелен границе и лежит снаружи
+                    return False, None
+                continue
+            t = q / p
+            if p < 0:
+                t_enter = max(t_enter, t)
+            else:
+                t_exit = min(t_exit, t)
+            if t_enter > t_exit:
+                return False, None
+        
+        return True, (x1 + t_enter * dx, y1 + t_enter * dy,
+                      x1 + t_exit * dx, y1 + t_exit * dy)
+
+    def liang_barsky_batch(self, segments):
+        """Алгоритм Лианга-Барски для массива отрезков (N, 4).
+
+        По каждой оси параметры пересечения с двумя границами упорядочиваются
+        min/max, поэтому вход и выход находятся без ветвлений по знаку p.
+        Возвращает флаги видимости и отсеченные координаты (nan для невидимых отрезков).
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        x1, y1, x2, y2 = segments.T
+        dx = x2 - x1
+        dy = y2 - y1
+        xmin, ymin, xmax, ymax = self.window
+        
+        # При dx = 0 деление дает inf нужного знака (граница не ограничивает отрезок
+        # или отсекает его целиком), а 0/0 означает конец на самой границе
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tx0 = (xmin - x1) / dx
+            tx1 = (xmax - x1) / dx
+            ty0 = (ymin - y1) / dy
+            ty1 = (ymax - y1) / dy
+        for low, high in ((tx0, tx1), (ty0, ty1)):
+            low[np.isnan(low)] = -np.inf
+            high[np.isnan(high)] = np.inf
+        
+        t_enter = np.maximum(np.maximum(np.minimum(tx0, tx1), np.minimum(ty0, ty1)), 0.0)
+        t_exit = np.minimum(np.minimum(np.maximum(tx0, tx1), np.maximum(ty0, ty1)), 1.0)
+        accepted = t_enter <= t_exit
+        
+        # У невидимых отрезков параметры могут быть бесконечными, их координаты отбрасываются
+        with np.errstate(invalid="ignore"):
+            clipped = np.stack([x1 + t_enter * dx, y1 + t_enter * dy,
+                                x1 + t_exit * dx, y1 + t_exit * dy], axis=1)
+        clipped[~accepted] = np.nan
+        return accepted, clipped
+
     def midpoint_subdivision(self, x1, y1, x2, y2):
         """Алгоритм разбиения средней точкой"""
         code1 = self.get_code(x1, y1)
@@ -163,8 +292,117 @@ class LineClipper:
             return True, line2
         return False, None
 
+    @staticmethod
+    def bisect(lo, hi):
+        """Середина отрезка; половины складываются, чтобы не переполниться
+        на концах порядка 1e308"""
+        return lo / 2 + hi / 2
+
+    def nearest_visible_point(self, x1, y1, x2, y2, tolerance=None):
+        """Ближайшая к (x1, y1) видимая точка отрезка (с точностью tolerance) или None.
+
+        Если середина лежит снаружи по той же границе, что и ближний конец,
+        то вся первая половина невидима; иначе видимая часть (если она есть)
+        целиком лежит в первой половине. Поэтому достаточно одного деления
+        пополам на шаг, без рекурсии по обеим половинам.
+        """
+        code_lo = self.get_code(x1, y1)
+        if code_lo == 0:
+            return x1, y1
+        code_hi = self.get_code(x2, y2)
+        if code_lo & code_hi:
+            return None
+        
+        # Делим, пока отрезок не короче tolerance или середина не совпала
+        # с концом: дальше в float делить нечего, глубина не ограничивается
+        tolerance = tolerance or self.tolerance
+        while math.hypot(x2 - x1, y2 - y1) > tolerance:
+            xm = self.bisect(x1, x2)
+            ym = self.bisect(y1, y2)
+            if (xm, ym) == (x1, y1) or (xm, ym) == (x2, y2):
+                break
+            code_m = self.get_code(xm, ym)
+            if code_m & code_lo:
+                x1, y1, code_lo = xm, ym, code_m
+            else:
+                x2, y2, code_hi = xm, ym, code_m
+        
+        # Видимая часть короче tolerance могла быть пропущена
+        return (x2, y2) if code_hi == 0 else None
+
+    def midpoint_iterative(self, x1, y1, x2, y2, tolerance=None):
+        """Разбиение средней точкой без рекурсии: каждый конец ищется отдельно,
+        O(log(длина / tolerance)) вычислений кода на конец"""
+        start = self.nearest_visible_point(x1, y1, x2, y2, tolerance)
+        if start is None:
+            return False, None
+        end = self.nearest_visible_point(x2, y2, x1, y1, tolerance)
+        if end is None:
+            return False, None
+        return True, (start[0], start[1], end[0], end[1])
+
+    def midpoint_batch(self, segments, tolerance=None):
+        """Разбиение средней точкой для массива отрезков (N, 4): поиски обоих концов
+        всех неопределенных отрезков выполняются одним векторным делением пополам.
+        Возвращает флаги видимости и отсеченные координаты (nan для невидимых)."""
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        clipped = segments.copy()
+        code1 = self.get_codes(segments[:, 0], segments[:, 1])
+        code2 = self.get_codes(segments[:, 2], segments[:, 3])
+        accepted = (code1 & code2) == 0
+        
+        # Поиск нужен только концам снаружи у не отброшенных тривиально отрезков:
+        # строка k ищет точку от lo к hi и пишет результат в столбцы column[k]
+        rows = np.concatenate([np.nonzero(accepted & (code1 != 0))[0],
+                               np.nonzero(accepted & (code2 != 0))[0]])
+        first = np.arange(rows.size) < np.count_nonzero(accepted & (code1 != 0))
+        column = np.where(first, 0, 2)
+        lo = np.where(first[:, np.newaxis], segments[rows, :2], segments[rows, 2:])
+        hi = np.where(first[:, np.newaxis], segments[rows, 2:], segments[rows, :2])
+        code_lo = np.where(first, code1[rows], code2[rows])
+        code_hi = np.where(first, code2[rows], code1[rows])
+        
+        # Как и в nearest_visible_point, строка делится до tolerance или до
+        # неподвижной точки float. Длина на каждом шаге ровно делится пополам,
+        # поэтому число шагов до tolerance известно заранее (для переполненной
+        # длины - бесконечно)
+        tolerance = tolerance or self.tolerance
+        with np.errstate(over="ignore"):
+            ratio = np.hypot(*(hi - lo).T) / tolerance
+        steps = np.ceil(np.log2(np.maximum(ratio, 1.0)))
+        active = np.flatnonzero(steps > 0)
+        step = 0
+        while active.size:
+            # Пока активна большая часть строк, дешевле считать весь массив,
+            # чем выбирать активные строки по индексам
+            part = slice(None) if 2 * active.size > len(lo) else active
+            index = np.arange(len(lo))[part]
+            mid = self.bisect(lo[part], hi[part])
+            code_m = self.get_codes(mid[:, 0], mid[:, 1])
+            moved = ((mid != lo[part]).any(axis=1) & (mid != hi[part]).any(axis=1)
+                     & (steps[part] > step))
+            to_lo = moved & ((code_m & code_lo[part]) != 0)
+            to_hi = moved & ~to_lo
+            lo[index[to_lo]], code_lo[index[to_lo]] = mid[to_lo], code_m[to_lo]
+            hi[index[to_hi]], code_hi[index[to_hi]] = mid[to_hi], code_m[to_hi]
+            step += 1
+            active = index[moved & (steps[part] > step)]
+        
+        found = code_hi == 0
+        accepted[rows[~found]] = False
+        clipped[rows, column] = hi[:, 0]
+        clipped[rows, column + 1] = hi[:, 1]
+        clipped[~accepted] = np.nan
+        return accepted, clipped
+
     def benchmark(self, algorithm, iterations=100):
-        """Тестирование производительности"""
+        """Тестирование производительности (для пакетных алгоритмов - время на один отрезок)"""
+        if algorithm.endswith("_batch"):
+            segments = np.random.uniform(-150, 150, size=(iterations, 4))
+            start_time = time.time()
+            getattr(self, algorithm)(segments)
+            return (time.time() - start_time) / iterations
+        
         total_time = 0
         for _ in range(iterations):
             x1 = random.uniform(-150, 150)
@@ -175,6 +413,10 @@ class LineClipper:
             start_time = time.time()
             if algorithm == "cohen":
                 self.cohen_sutherland(x1, y1, x2, y2)
+            elif algorithm == "liang":
+                self.liang_barsky(x1, y1, x2, y2)
+            elif algorithm == "midpoint_iterative":
+                self.midpoint_iterative(x1, y1, x2, y2)
             else:
                 self.midpoint_subdivision(x1, y1, x2, y2)
             total_time += time.time() - start_time
@@ -189,7 +431,13 @@ def main():
     clipper = LineClipper()
     clock = pygame.time.Clock()
     
-    current_algorithm = "cohen"  # или "midpoint"
+    current_algorithm = "cohen"  # или "midpoint", "liang", "midpoint_iterative"
+    algorithms = {
+        "cohen": ("Сазерленд-Коэн", clipper.cohen_sutherland),
+        "midpoint": ("Разбиение средней точкой", clipper.midpoint_subdivision),
+        "liang": ("Лианг-Барски", clipper.liang_barsky),
+        "midpoint_iterative": ("Итеративное разбиение средней точкой", clipper.midpoint_iterative)
+    }
     show_info = True
     lines = clipper.draw_demo_lines()
     
@@ -203,14 +451,28 @@ def main():
                     current_algorithm = "cohen"
                 elif event.key == pygame.K_2:
                     current_algorithm = "midpoint"
+                elif event.key == pygame.K_3:
+                    current_algorithm = "liang"
+                elif event.key == pygame.K_4:
+                    current_algorithm = "midpoint_iterative"
                 elif event.key == pygame.K_i:
                     show_info = not show_info
                 elif event.key == pygame.K_b:
                     # Запуск теста производительности
                     cohen_time = clipper.benchmark("cohen")
                     midpoint_time = clipper.benchmark("midpoint")
+                    liang_time = clipper.benchmark("liang")
+                    iterative_time = clipper.benchmark("midpoint_iterative")
+                    cohen_batch_time = clipper.benchmark("cohen_sutherland_batch", 100000)
+                    liang_batch_time = clipper.benchmark("liang_barsky_batch", 100000)
+                    midpoint_batch_time = clipper.benchmark("midpoint_batch", 100000)
                     print(f"Cohen-Sutherland time: {cohen_time*1000:.6f} ms")
                     print(f"Midpoint time: {midpoint_time*1000:.6f} ms")
+                    print(f"Liang-Barsky time: {liang_time*1000:.6f} ms")
+                    print(f"Iterative midpoint time: {iterative_time*1000:.6f} ms")
+                    print(f"Cohen-Sutherland batch time: {cohen_batch_time*1000:.6f} ms")
+                    print(f"Liang-Barsky batch time: {liang_batch_time*1000:.6f} ms")
+                    print(f"Midpoint batch time: {midpoint_batch_time*1000:.6f} ms")
         
         # Отрисовка
         screen.fill((0, 0, 0))
@@ -232,10 +494,7 @@ def main():
                             clipper.offset[1] - line[3] * clipper.scale))
             
             # Отсеченный отрезок (если видим)
-            if current_algorithm == "cohen":
-                accept, clipped = clipper.cohen_sutherland(line[0], line[1], line[2], line[3])
-            else:
-                accept, clipped = clipper.midpoint_subdivision(line[0], line[1], line[2], line[3])
+            accept, clipped = algorithms[current_algorithm][1](line[0], line[1], line[2], line[3])
                 
             if accept and clipped:
                 pygame.draw.line(screen, (255, 255, 255),
@@ -246,10 +505,12 @@ def main():
         
         if show_info:
             info_text = [
-                f"Алгоритм: {'Сазерленд-Коэн' if current_algorithm == 'cohen' else 'Разбиение средней точкой'}",
+                f"Алгоритм: {algorithms[current_algorithm][0]}",
                 "Управление:",
                 "1 - Алгоритм Сазерленда-Коэна",
                 "2 - Алгоритм разбиения средней точкой",
+                "3 - Алгоритм Лианга-Барски",
+                "4 - Итеративное разбиение средней точкой",
                 "I - Показать/скрыть информацию",
                 "B - Тест производительности",
                 "ЛКМ - Добавить отрезок"
@@ -14,6 +14,7 @@
   * w·n (скалярное произведение)
   * D·n (скалярное произведение директрисы)
   * t (параметр)
+- Пакетное отсечение массивов отрезков (нормали ребер хранятся в массивах NumPy)
 
 Управление:
 - I - Показать/скрыть информацию
@@ -75,6 +76,11 @@ class CyrusBeckClipper:
                 'normal': normal,
                 'edge': edge
             })
+        
+        # Те же ребра в виде массивов для пакетного отсечения: внешние нормали
+        # и константы n·f, чтобы для отрезка оставалось только p1·n
+        self.edge_points, self.normals = self.geometry.convex_edges(self.vertices)
+        self.constants = np.einsum("ij,ij->i", self.edge_points, self.normals)
 
     def get_line_intersection(self, p1, p2, p3, p4):
         return self.geometry.get_line_intersection(p1, p2, p3, p4)
@@ -82,8 +88,8 @@ class CyrusBeckClipper:
     def dot_product(self, v1, v2):
         return self.geometry.dot_product(v1, v2)
 
-    def cyrus_beck(self, p1, p2):
-        """Алгоритм Кируса-Бека для отсечения отрезка"""
+    def cyrus_beck(self, p1, p2, with_results=False):
+        """Алгоритм Кируса-Бека для отсечения отрезка (таблица параметров - по запросу)"""
         # Вектор направления отрезка
         D = (p2[0] - p1[0], p2[1] - p1[1])
         
@@ -98,22 +104,23 @@ class CyrusBeckClipper:
             n = edge['normal']  # Нормаль к ребру
             w = edge['p']       # Точка на ребре
             
-            # Вычисляем скалярные произведения
+            # Вычисляем скалярные произведения (весовая функция w = P1 - f)
             D_dot_n = self.dot_product(D, n)
-            w_minus_p = (w[0] - p1[0], w[1] - p1[1])
-            w_dot_n = self.dot_product(w_minus_p, n)
+            p_minus_w = (p1[0] - w[0], p1[1] - w[1])
+            w_dot_n = self.dot_product(p_minus_w, n)
             
             # Сохраняем результаты для вывода
-            results.append({
-                'n': n,
-                'f': w,
-                'w·n': w_dot_n,
-                'D·n': D_dot_n,
-                't': -(w_dot_n / D_dot_n) if D_dot_n != 0 else None
-            })
+            if with_results:
+                results.append({
+                    'n': n,
+                    'f': w,
+                    'w·n': w_dot_n,
+                    'D·n': D_dot_n,
+                    't': -(w_dot_n / D_dot_n) if D_dot_n != 0 else None
+                })
             
             if D_dot_n == 0:  # Отрезок параллелен ребру
-                if w_dot_n < 0:
+                if w_dot_n > 0:
                     return False, None, results  # Отрезок снаружи
                 continue
             
@@ -137,6 +144,17 @@ class CyrusBeckClipper:
         
         return False, None, results
 
+    def cyrus_beck_batch(self, segments):
+        """Пакетный алгоритм Кируса-Бека для массива отрезков (N, 4)"""
+        return self.geometry.cyrus_beck_batch(segments, self.normals, self.constants)
+
+    def benchmark_batch(self, num_segments=100000):
+        """Время отсечения одного отрезка в пакетном режиме"""
+        segments = np.random.uniform(-5, 5, size=(num_segments, 4))
+        start_time = time.time()
+        self.cyrus_beck_batch(segments)
+        return (time.time() - start_time) / num_segments
+
     def benchmark(self, iterations=100):
         """Тестирование производительности"""
         total_time = 0
@@ -173,6 +191,10 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_i:
                     show_info = not show_info
+                elif event.key == pygame.K_b:
+                    # Запуск теста производительности
+                    print(f"Average time per line: {clipper.benchmark()*1000:.6f} ms")
+                    print(f"Batch time per line: {clipper.benchmark_batch()*1000:.6f} ms")
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # ЛКМ - задаем новый отрезок
                     mouse_x = (event.pos[0] - clipper.offset[0]) / clipper.scale
@@ -188,7 +210,7 @@ def main():
         pygame.draw.polygon(screen, (100, 100, 100), points, 1)
         
         # Отсекаем отрезок
-        visible, clipped, results = clipper.cyrus_beck(line[0], line[1])
+        visible, clipped, results = clipper.cyrus_beck(line[0], line[1], with_results=show_info)
         
         # Рисуем исходный отрезок
         pygame.draw.line(screen, (100, 100, 100),
@@ -3,7 +3,7 @@
 
 Реализация расширенной версии алгоритма Кируса-Бека:
 1. Внутреннее отсечение (сохранение части внутри многоугольника)
-2. Внешнее отсечение (сохранение части вне многоугольника)
+2. Внешнее отсечение (сохранение части вне многоугольника: до двух частей отрезка)
 
 Особенности:
 - Поддержка произвольных выпуклых многоугольников
@@ -11,6 +11,8 @@
 - Визуализация процесса отсечения
 - Вывод параметров для каждого ребра
 - Анализ зависимости времени от числа сторон
+- Пакетное отсечение массивов отрезков (нормали ребер хранятся в массивах NumPy)
+- Кэш подготовленных областей отсечения по числу сторон и радиусу
 
 Управление:
 - M - Переключение режима (внутреннее/внешнее)
@@ -46,46 +48,61 @@ class CyrusBeckExtendedClipper:
         
         self.clip_mode = "inside"  # или "outside"
         self.num_sides = 6  # Количество сторон многоугольника
+        self.radius = 2  # Радиус описанной окружности
         self.scale = 50
         self.offset = [400, 300]
         
+        # Кэш подготовленных областей отсечения
+        self.regions = {}
         self.update_polygon()
 
     def dot_product(self, v1, v2):
         """Скалярное произведение векторов"""
         return self.geometry.dot_product(v1, v2)
 
+    def prepare_region(self, num_sides, radius):
+        """Подготовленная выпуклая область из кэша по ключу (число сторон, радиус).
+        
+        Хранит вершины, ненормированные внешние нормали (для Кируса-Бека длина
+        нормали не важна) и константы n·f. Оба режима отсечения используют одну
+        область: внешнее отсечение оставляет части отрезка вне интервала,
+        найденного для внутреннего.
+        """
+        key = (num_sides, radius)
+        region = self.regions.get(key)
+        if region is not None:
+            return region
+        
+        angles = 2 * np.pi * np.arange(num_sides) / num_sides
+        vertices = radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        _, normals = self.geometry.convex_edges(vertices)
+        region = {
+            'vertices': vertices,
+            'normals': normals,
+            'constants': np.einsum("ij,ij->i", vertices, normals)
+        }
+        
+        # Таблица ребер для пошагового алгоритма и вывода параметров
+        edges = (np.roll(vertices, -1, axis=0) - vertices).tolist()
+        region['edges'] = [{'p': tuple(p), 'normal': tuple(n), 'edge': tuple(e)}
+                           for p, n, e in zip(vertices.tolist(), normals.tolist(), edges)]
+        self.regions[key] = region
+        return region
+
     def update_polygon(self):
-        """Обновляет вершины многоугольника"""
-        self.vertices = []
-        for i in range(self.num_sides):
-            angle = 2 * math.pi * i / self.num_sides
-            x = 2 * math.cos(angle)
-            y = 2 * math.sin(angle)
-            self.vertices.append((x, y))
-            
-        # Вычисляем нормали и точки для каждого ребра
-        self.edges = []
-        for i in range(len(self.vertices)):
-            p1 = self.vertices[i]
-            p2 = self.vertices[(i + 1) % len(self.vertices)]
-            
-            # Вычисляем вектор ребра и нормаль
-            edge = (p2[0] - p1[0], p2[1] - p1[1])
-            normal = self.geometry.normalize_vector((-edge[1], edge[0]))
-            
-            # Для внешнего отсечения инвертируем нормали
-            if self.clip_mode == "outside":
-                normal = (-normal[0], -normal[1])
-            
-            self.edges.append({
-                'p': p1,
-                'normal': normal,
-                'edge': edge
-            })
+        """Переключает многоугольник на подготовленную область из кэша"""
+        region = self.prepare_region(self.num_sides, self.radius)
+        self.vertices = region['vertices']
+        self.edges = region['edges']
+        self.normals = region['normals']
+        self.constants = region['constants']
 
-    def cyrus_beck(self, p1, p2):
-        """Алгоритм Кируса-Бека для отсечения отрезка"""
+    def cyrus_beck(self, p1, p2, with_results=False):
+        """Алгоритм Кируса-Бека для отсечения отрезка (таблица параметров - по запросу).
+        
+        Всегда оставляет часть внутри многоугольника; для внешнего режима
+        видимые части дает exterior_clip по тем же параметрам.
+        """
         # Вектор направления отрезка
         D = (p2[0] - p1[0], p2[1] - p1[1])
         
@@ -100,22 +117,23 @@ class CyrusBeckExtendedClipper:
             n = edge['normal']  # Нормаль к ребру
             w = edge['p']       # Точка на ребре
             
-            # Вычисляем скалярные произведения
+            # Вычисляем скалярные произведения (весовая функция w = P1 - f)
             D_dot_n = self.dot_product(D, n)
-            w_minus_p = (w[0] - p1[0], w[1] - p1[1])
-            w_dot_n = self.dot_product(w_minus_p, n)
+            p_minus_w = (p1[0] - w[0], p1[1] - w[1])
+            w_dot_n = self.dot_product(p_minus_w, n)
             
             # Сохраняем результаты для вывода
-            results.append({
-                'n': n,
-                'f': w,
-                'w·n': w_dot_n,
-                'D·n': D_dot_n,
-                't': -(w_dot_n / D_dot_n) if D_dot_n != 0 else None
-            })
+            if with_results:
+                results.append({
+                    'n': n,
+                    'f': w,
+                    'w·n': w_dot_n,
+                    'D·n': D_dot_n,
+                    't': -(w_dot_n / D_dot_n) if D_dot_n != 0 else None
+                })
             
             if D_dot_n == 0:  # Отрезок параллелен ребру
-                if w_dot_n < 0:
+                if w_dot_n > 0:
                     return False, None, results  # Отрезок снаружи
                 continue
             
@@ -139,8 +157,93 @@ class CyrusBeckExtendedClipper:
         
         return False, None, results
 
+    def cyrus_beck_batch(self, segments):
+        """Пакетный алгоритм Кируса-Бека для массива отрезков (N, 4): части внутри
+        многоугольника (для внешнего режима - exterior_clip_batch)"""
+        return self.geometry.cyrus_beck_batch(segments, self.normals, self.constants)
+
+    def exterior_clip(self, p1, p2):
+        """Внешнее отсечение: список частей отрезка вне многоугольника (0, 1 или 2 части).
+        
+        Интервал [t_enter, t_exit] внутри многоугольника ищется так же, как во
+        внутреннем отсечении, а видимыми остаются [0, t_enter] и [t_exit, 1].
+        """
+        D = (p2[0] - p1[0], p2[1] - p1[1])
+        t_enter = -math.inf
+        t_exit = math.inf
+        
+        for edge in self.edges:
+            n = edge['normal']
+            w = edge['p']
+            D_dot_n = self.dot_product(D, n)
+            w_dot_n = self.dot_product((p1[0] - w[0], p1[1] - w[1]), n)
+            
+            if D_dot_n == 0:
+                if w_dot_n > 0:  # Прямая не пересекает многоугольник
+                    return [(p1, p2)]
+                continue
+            t = -w_dot_n / D_dot_n
+            if D_dot_n < 0:
+                t_enter = max(t_enter, t)
+            else:
+                t_exit = min(t_exit, t)
+        
+        t_enter = max(t_enter, 0.0)
+        t_exit = min(t_exit, 1.0)
+        if t_enter >= t_exit:  # Отрезок не заходит внутрь
+            return [(p1, p2)]
+        
+        def point(t):
+            return (p1[0] + D[0] * t, p1[1] + D[1] * t)
+        
+        pieces = []
+        if t_enter > 0:
+            pieces.append((p1, point(t_enter)))
+        if t_exit < 1:
+            pieces.append((point(t_exit), p2))
+        return pieces
+
+    def exterior_clip_batch(self, segments):
+        """Внешнее отсечение массива отрезков (N, 4).
+        
+        Возвращает неровный массив: offsets (N + 1,) и части (M, 4), частями
+        отрезка i являются pieces[offsets[i]:offsets[i + 1]].
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        t_enter, t_exit, blocked = self.geometry.clip_parameters(
+            segments, self.normals, self.constants)
+        t_enter = np.maximum(t_enter, 0.0)
+        t_exit = np.minimum(t_exit, 1.0)
+        crossed = ~blocked & (t_enter < t_exit)
+        
+        # До двух частей на отрезок: [0, t_enter] (или весь отрезок) и [t_exit, 1]
+        has_first = ~crossed | (t_enter > 0)
+        has_second = crossed & (t_exit < 1)
+        first_end = np.where(crossed, t_enter, 1.0)
+        second_start = np.where(crossed, t_exit, 0.0)
+        
+        p1 = segments[:, :2]
+        D = segments[:, 2:] - p1
+        first = np.concatenate([p1, p1 + first_end[:, np.newaxis] * D], axis=1)
+        second = np.concatenate([p1 + second_start[:, np.newaxis] * D, segments[:, 2:]], axis=1)
+        
+        keep = np.stack([has_first, has_second], axis=1)
+        pieces = np.stack([first, second], axis=1)[keep]
+        offsets = np.concatenate([[0], np.cumsum(keep.sum(axis=1))])
+        return offsets, pieces
+
+    def benchmark_batch(self, num_segments=100000):
+        """Время отсечения одного отрезка в пакетном режиме (для внешнего режима - с двумя частями)"""
+        segments = np.random.uniform(-5, 5, size=(num_segments, 4))
+        start_time = time.time()
+        if self.clip_mode == "outside":
+            self.exterior_clip_batch(segments)
+        else:
+            self.cyrus_beck_batch(segments)
+        return (time.time() - start_time) / num_segments
+
     def benchmark(self, iterations=100):
-        """Тестирование производительности"""
+        """Тестирование производительности (в текущем режиме отсечения)"""
         total_time = 0
         for _ in range(iterations):
             x1 = np.random.uniform(-5, 5)
@@ -149,7 +252,10 @@ class CyrusBeckExtendedClipper:
             y2 = np.random.uniform(-5, 5)
             
             start_time = time.time()
-            self.cyrus_beck((x1, y1), (x2, y2))
+            if self.clip_mode == "outside":
+                self.exterior_clip((x1, y1), (x2, y2))
+            else:
+                self.cyrus_beck((x1, y1), (x2, y2))
             total_time += time.time() - start_time
             
         return total_time / iterations
@@ -173,7 +279,6 @@ def main():
                     show_info = not show_info
                 elif event.key == pygame.K_m:
                     clipper.clip_mode = "outside" if clipper.clip_mode == "inside" else "inside"
-                    clipper.update_polygon()
                 elif event.key in [pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8]:
                     clipper.num_sides = int(event.unicode)
                     clipper.update_polygon()
@@ -181,6 +286,7 @@ def main():
                     # Запуск теста производительности
                     avg_time = clipper.benchmark()
                     print(f"Average time per line: {avg_time*1000:.6f} ms")
+                    print(f"Batch time per line: {clipper.benchmark_batch()*1000:.6f} ms")
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # ЛКМ - задаем новый отрезок
                     mouse_x = (event.pos[0] - clipper.offset[0]) / clipper.scale
@@ -197,7 +303,7 @@ def main():
         pygame.draw.polygon(clipper.screen, (100, 100, 100), points, 1)
         
         # Отсекаем отрезок
-        visible, clipped, results = clipper.cyrus_beck(line[0], line[1])
+        visible, clipped, results = clipper.cyrus_beck(line[0], line[1], with_results=show_info)
         
         # Рисуем исходный отрезок
         pygame.draw.line(clipper.screen, (100, 100, 100),
@@ -206,13 +312,17 @@ def main():
                         (clipper.offset[0] + line[1][0] * clipper.scale,
                          clipper.offset[1] - line[1][1] * clipper.scale))
         
-        # Рисуем отсеченный отрезок, если он видим
-        if visible and clipped:
+        # Рисуем видимые части: при внешнем отсечении их может быть две
+        if clipper.clip_mode == "outside":
+            pieces = clipper.exterior_clip(line[0], line[1])
+        else:
+            pieces = [clipped] if visible and clipped else []
+        for start, end in pieces:
             pygame.draw.line(clipper.screen, (255, 255, 255),
-                           (clipper.offset[0] + clipped[0][0] * clipper.scale,
-                            clipper.offset[1] - clipped[0][1] * clipper.scale),
-                           (clipper.offset[0] + clipped[1][0] * clipper.scale,
-                            clipper.offset[1] - clipped[1][1] * clipper.scale), 2)
+                           (clipper.offset[0] + start[0] * clipper.scale,
+                            clipper.offset[1] - start[1] * clipper.scale),
+                           (clipper.offset[0] + end[0] * clipper.scale,
+                            clipper.offset[1] - end[1] * clipper.scale), 2)
         
         if show_info:
             # Выводим таблицу результатов
@@ -14,10 +14,15 @@
 - Отображение окна отсечения
 - Вывод результирующего многоугольника
 - Интерактивное управление просмотром
+- Заливка результата построчным алгоритмом с таблицей ребер
+- Потоковый конвейер отсечения (генератор на каждое ребро окна) для множества многоугольников
+- Векторное отсечение массивов вершин по произвольному выпуклому окну
 
 Управление:
 - Пробел - Показать/скрыть этапы
 - Стрелки влево/вправо - Переключение этапов
+- F - Показать/скрыть заливку результата
+- B - Тест производительности (потоковое отсечение множества многоугольников)
 - ЛКМ - Добавить новую точку
 
 Автор: Царюк Артём Владимирович
@@ -26,8 +31,10 @@
 
 import pygame
 import numpy as np
+import time
 from utils.geometry import GeometryUtils
 from utils.graphics import GraphicsBuffer
+from utils.scanline import PolygonFiller
 from utils.ui import UIManager
 from utils.benchmark import Benchmark
 
@@ -57,6 +64,9 @@ class SutherlandHodgmanClipper:
         
         # История отсечения для визуализации этапов
         self.clipping_history = []
+        
+        # Нормали и константы ребер выпуклых окон для векторного отсечения
+        self.window_cache = {}
 
     def get_line_intersection(self, p1, p2, p3, p4):
         """Находит точку пересечения двух отрезков"""
@@ -68,41 +78,169 @@ class SutherlandHodgmanClipper:
         point_vector = (point[0] - edge_start[0], point[1] - edge_start[1])
         return self.geometry.dot_product((-edge_vector[1], edge_vector[0]), point_vector) >= 0
 
-    def clip_polygon(self):
-        """Алгоритм Сазерленда-Ходжмена"""
-        input_polygon = self.polygon.copy()
-        self.clipping_history = [input_polygon.copy()]
-        
-        for i in range(len(self.window)):
-            edge_start = self.window[i]
-            edge_end = self.window[(i + 1) % len(self.window)]
-            
-            output_polygon = []
-            
-            for j in range(len(input_polygon)):
-                current = input_polygon[j]
-                prev = input_polygon[j - 1]
-                
-                # Находим точку пересечения
+    def clip_stage(self, vertices, edge_start, edge_end):
+        """Одна стадия конвейера: принимает поток вершин и выдает вершины,
+        отсеченные ребром окна (edge_start, edge_end), не накапливая списков"""
+        first = prev = None
+        prev_inside = first_inside = False
+        
+        for current in vertices:
+            current_inside = self.is_inside(current, edge_start, edge_end)
+            if prev is None:
+                first, first_inside = current, current_inside
+            else:
+                yield from self.clip_edge(prev, prev_inside, current, current_inside,
+                                          edge_start, edge_end)
+            prev, prev_inside = current, current_inside
+        
+        # Замыкающее ребро (последняя вершина -> первая)
+        if prev is not None:
+            yield from self.clip_edge(prev, prev_inside, first, first_inside,
+                                      edge_start, edge_end)
+
+    def clip_edge(self, prev, prev_inside, current, current_inside, edge_start, edge_end):
+        """Вершины, которые ребро многоугольника prev -> current добавляет в результат"""
+        # Если текущая точка внутри
+        if current_inside:
+            # Если предыдущая точка снаружи, добавляем точку пересечения
+            if not prev_inside:
                 intersection = self.get_line_intersection(prev, current, edge_start, edge_end)
-                
-                # Если текущая точка внутри
-                if self.is_inside(current, edge_start, edge_end):
-                    # Если предыдущая точка снаружи, добавляем точку пересечения
-                    if not self.is_inside(prev, edge_start, edge_end):
-                        if intersection:
-                            output_polygon.append(intersection)
-                    output_polygon.append(current)
-                # Если текущая точка снаружи, но предыдущая внутри
-                elif self.is_inside(prev, edge_start, edge_end):
-                    if intersection:
-                        output_polygon.append(intersection)
-            
-            input_polygon = output_polygon
-            if output_polygon:
-                self.clipping_history.append(output_polygon.copy())
-        
-        return input_polygon
+                if intersection:
+                    yield intersection
+            yield current
+        # Если текущая точка снаружи, но предыдущая внутри
+        elif prev_inside:
+            intersection = self.get_line_intersection(prev, current, edge_start, edge_end)
+            if intersection:
+                yield intersection
+
+    @staticmethod
+    def record(vertices, history):
+        """Пропускает поток вершин, сохраняя его копию в history"""
+        for vertex in vertices:
+            history.append(vertex)
+            yield vertex
+
+    @staticmethod
+    def is_clockwise(window):
+        """Проверяет обход выпуклого окна по часовой стрелке (отрицательная площадь)"""
+        return sum(x1 * y2 - x2 * y1
+                   for (x1, y1), (x2, y2) in zip(window, window[1:] + window[:1])) < 0
+
+    def clip_stream(self, vertices, window=None, history=None):
+        """Генератор вершин отсеченного многоугольника: по одной стадии-генератору
+        на каждое ребро окна. Если передан список history, в него добавляются
+        выходы стадий (для пошаговой визуализации).
+
+        is_inside считает внутренней левую сторону ребра, поэтому для окна,
+        обходимого по часовой стрелке, концы каждого ребра меняются местами
+        (порядок стадий остается тем же, что и в clip_polygon_array).
+        """
+        window = list(self.window if window is None else window)
+        clockwise = self.is_clockwise(window)
+        stream = iter(vertices)
+        for i in range(len(window)):
+            edge_start, edge_end = window[i], window[(i + 1) % len(window)]
+            if clockwise:
+                edge_start, edge_end = edge_end, edge_start
+            stream = self.clip_stage(stream, edge_start, edge_end)
+            if history is not None:
+                stage = []
+                history.append(stage)
+                stream = self.record(stream, stage)
+        return stream
+
+    def clip_polygons(self, polygons, window=None, keep_history=False):
+        """Отсечение последовательности многоугольников (в том числе генератора).
+        
+        Многоугольники обрабатываются по одному, поэтому память не зависит от их числа.
+        Выдает списки вершин результатов, а при keep_history=True - пары
+        (результат, список выходов стадий).
+        """
+        for polygon in polygons:
+            history = [] if keep_history else None
+            result = list(self.clip_stream(polygon, window, history))
+            yield (result, history) if keep_history else result
+
+    def clip_polygon(self, keep_history=True):
+        """Алгоритм Сазерленда-Ходжмена для self.polygon"""
+        if not keep_history:
+            return next(self.clip_polygons([self.polygon]))
+        
+        result, history = next(self.clip_polygons([self.polygon], keep_history=True))
+        # Исходный многоугольник и непустые выходы стадий
+        self.clipping_history = [self.polygon.copy()] + [stage for stage in history if stage]
+        return result
+
+    def window_edges(self, window=None):
+        """Внешние нормали (E, 2) и константы n·f (E,) ребер выпуклого окна"""
+        window = self.window if window is None else window
+        key = tuple(tuple(point) for point in window)
+        if key not in self.window_cache:
+            points, normals = self.geometry.convex_edges(window)
+            self.window_cache[key] = (normals, np.einsum("ij,ij->i", points, normals))
+        return self.window_cache[key]
+
+    @staticmethod
+    def clip_array_stage(vertices, normal, constant):
+        """Стадия отсечения массива вершин (M, 2) полуплоскостью n·p <= c.
+        
+        Проверка стороны выполняется сразу для всех вершин, ребра с пересечением
+        находятся сравнением маски со сдвинутой копией, все точки пересечения
+        вычисляются одним шагом, а результат собирается выборкой по маске:
+        для вершины j - [пересечение ребра (j-1, j)], затем [вершина j].
+        """
+        distance = vertices @ normal - constant
+        inside = distance <= 0
+        prev = np.roll(vertices, 1, axis=0)
+        prev_distance = np.roll(distance, 1)
+        crossing = inside != np.roll(inside, 1)
+        
+        intersections = np.empty_like(vertices)
+        t = prev_distance[crossing] / (prev_distance[crossing] - distance[crossing])
+        intersections[crossing] = prev[crossing] + t[:, np.newaxis] * \
+            (vertices[crossing] - prev[crossing])
+        
+        keep = np.stack([crossing, inside], axis=1)
+        return np.stack([intersections, vertices], axis=1)[keep]
+
+    def clip_polygon_array(self, vertices, window=None):
+        """Векторный алгоритм Сазерленда-Ходжмена для произвольного выпуклого окна.
+        Принимает и возвращает массив вершин (M, 2)."""
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        for normal, constant in zip(*self.window_edges(window)):
+            if not len(vertices):
+                break
+            vertices = self.clip_array_stage(vertices, normal, constant)
+        return vertices
+
+    def benchmark(self, num_polygons=10000, num_vertices=8, method="stream"):
+        """Время отсечения одного многоугольника: потоковым конвейером ("stream")
+        или векторными стадиями ("array")"""
+        def random_polygons():
+            for _ in range(num_polygons):
+                yield [tuple(p) for p in np.random.uniform(-5, 15, size=(num_vertices, 2)).tolist()]
+        
+        start_time = time.time()
+        if method == "array":
+            for polygon in random_polygons():
+                self.clip_polygon_array(polygon)
+        else:
+            for _ in self.clip_polygons(random_polygons()):
+                pass
+        return (time.time() - start_time) / num_polygons
+
+    def to_screen(self, polygon):
+        """Переводит вершины многоугольника в координаты экрана"""
+        return [(self.offset[0] + x * self.scale,
+                 self.offset[1] - y * self.scale) for x, y in polygon]
+
+    def fill_polygon(self, polygon, rule="evenodd", value=0.5):
+        """Заливает многоугольник в буфер отрезками строк и возвращает поверхность буфера"""
+        self.buffer.clear()
+        PolygonFiller.fill(self.buffer, self.to_screen(polygon), rule, value)
+        self.buffer.update()
+        return self.buffer.surface
 
 def main():
     pygame.init()
@@ -115,6 +253,7 @@ def main():
     # Начальное отсечение
     clipped_polygon = clipper.clip_polygon()
     show_steps = False
+    show_fill = True
     current_step = 0
     font = pygame.font.Font(None, 24)
     
@@ -127,6 +266,16 @@ def main():
                 if event.key == pygame.K_SPACE:
                     show_steps = not show_steps
                     current_step = 0
+                elif event.key == pygame.K_f:
+                    show_fill = not show_fill
+                elif event.key == pygame.K_b:
+                    # Запуск теста производительности
+                    print(f"Streaming time per polygon: {clipper.benchmark()*1000:.6f} ms")
+                    for num_vertices in (8, 1000):
+                        array_time = clipper.benchmark(100, num_vertices, method="array")
+                        stream_time = clipper.benchmark(100, num_vertices)
+                        print(f"{num_vertices} vertices: array {array_time*1000:.6f} ms, "
+                              f"stream {stream_time*1000:.6f} ms")
                 elif event.key == pygame.K_RIGHT and show_steps:
                     current_step = (current_step + 1) % len(clipper.clipping_history)
                 elif event.key == pygame.K_LEFT and show_steps:
@@ -140,6 +289,11 @@ def main():
         pygame.draw.polygon(screen, (50, 50, 50), window_points)
         pygame.draw.polygon(screen, (100, 100, 100), window_points, 1)
         
+        # Заливка результата (буфер складывается с уже нарисованным окном)
+        if show_fill:
+            screen.blit(clipper.fill_polygon(clipped_polygon), (0, 0),
+                        special_flags=pygame.BLEND_ADD)
+        
         # Рисуем исходный многоугольник
         polygon_points = [(clipper.offset[0] + x * clipper.scale,
                           clipper.offset[1] - y * clipper.scale) for x, y in clipper.polygon]
@@ -164,6 +318,7 @@ def main():
             "Управление:",
             "Пробел - показать/скрыть этапы",
             "Стрелки влево/вправо - переключение этапов",
+            "F - показать/скрыть заливку",
             f"Этап: {current_step + 1}/{len(clipper.clipping_history)}" if show_steps else "Финальный результат"
         ]
         
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Проекты импортируются из корня репозитория, окно pygame не создается
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
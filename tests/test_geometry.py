@@ -0,0 +1,47 @@
+import numpy as np
+
+from utils.geometry import GeometryUtils
+
+
+def brute_force_pairs(a, b):
+    pairs = set()
+    for i, (x1, y1, x2, y2) in enumerate(a):
+        for j, (x3, y3, x4, y4) in enumerate(b):
+            r, s, qp = (x2 - x1, y2 - y1), (x4 - x3, y4 - y3), (x3 - x1, y3 - y1)
+            denominator = r[0] * s[1] - r[1] * s[0]
+            if denominator == 0:
+                continue
+            t = (qp[0] * s[1] - qp[1] * s[0]) / denominator
+            u = (qp[0] * r[1] - qp[1] * r[0]) / denominator
+            if 0 <= t <= 1 and 0 <= u <= 1:
+                pairs.add((i, j))
+    return pairs
+
+
+def test_long_and_short_edges_match_brute_force():
+    rng = np.random.default_rng(2)
+    # Короткие ребра вперемешку с длинными диагоналями через всю область
+    short = rng.uniform(0, 100, size=(300, 2))
+    short = np.hstack([short, short + rng.uniform(-2, 2, size=(300, 2))])
+    long = np.hstack([rng.uniform(0, 5, size=(20, 2)), rng.uniform(95, 100, size=(20, 2))])
+    a = np.concatenate([short[:150], long[:10]])
+    b = np.concatenate([short[150:], long[10:], long[:3, [2, 1, 0, 3]]])
+    i, j, t, u, points = GeometryUtils.segment_intersections(a, b)
+    assert set(zip(i.tolist(), j.tolist())) == brute_force_pairs(a.tolist(), b.tolist())
+    assert np.allclose(points, b[j, :2] + u[:, np.newaxis] * (b[j, 2:] - b[j, :2]))
+
+
+def test_diagonal_edge_registers_cells_along_its_path():
+    diagonal = np.array([[0.0, 0.0, 1000.0, 1000.0]])
+    index, columns, rows = GeometryUtils.grid_cells(diagonal, np.zeros(2), 1.0)
+    # Габарит дал бы миллион ячеек, путь отрезка - порядка тысячи
+    assert len(index) < 4 * 1000
+    assert np.all(np.abs(columns - rows) <= 1)
+
+
+def test_shared_vertex_on_cell_boundary_is_found():
+    a = np.array([[0.0, 0.0, 2.0, 2.0]])
+    b = np.array([[2.0, 2.0, 4.0, 0.0], [2.0, 0.0, 2.0, 4.0]])
+    i, j, t, u, points = GeometryUtils.segment_intersections(a, b, cell_size=1.0)
+    assert sorted(j.tolist()) == [0, 1]
+    assert np.allclose(points, [[2.0, 2.0], [2.0, 2.0]])
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from project10 import BOOLEAN_OPERATIONS, WeilerAthertonClipper
+
+SQUARE = {'outer': [(0, 0), (10, 0), (10, 10), (0, 10)]}
+
+CASES = {
+    'overlap': (SQUARE, {'outer': [(5, 5), (15, 5), (15, 15), (5, 15)]}),
+    'identical': (SQUARE, SQUARE),
+    'shared_edge': (SQUARE, {'outer': [(10, 0), (20, 0), (20, 10), (10, 10)]}),
+    'vertex_on_edge': ({'outer': [(0, 0), (10, 0), (5, 8)]},
+                       {'outer': [(5, 0), (10, 8), (0, 8)]}),
+    'hole': ({'outer': [(0, 0), (10, 0), (10, 10), (0, 10)], 'inner': [[(3, 3), (3, 7), (7, 7), (7, 3)]]},
+             {'outer': [(5, -5), (15, -5), (15, 15), (5, 15)]}),
+    'contained': (SQUARE, {'outer': [(2, 2), (8, 2), (8, 8), (2, 8)]}),
+    'disjoint': (SQUARE, {'outer': [(20, 0), (30, 0), (30, 10), (20, 10)]}),
+}
+
+EXPECTED = {
+    "intersection": lambda a, b: a & b,
+    "union": lambda a, b: a | b,
+    "difference": lambda a, b: a & ~b,
+    "xor": lambda a, b: a ^ b,
+}
+
+
+@pytest.fixture
+def clipper():
+    return WeilerAthertonClipper()
+
+
+def inside(clipper, points, polygons):
+    rings = [clipper.polygon_rings(polygon) for polygon in polygons]
+    return np.array([any(clipper.point_in_rings(point, polygon) for polygon in rings)
+                     for point in points.tolist()], dtype=bool)
+
+
+def area(polygons):
+    def ring_area(ring):
+        x, y = np.asarray(ring, dtype=np.float64).T
+        return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+    return sum(ring_area(polygon['outer']) - sum(map(ring_area, polygon.get('inner', [])))
+               for polygon in polygons)
+
+
+@pytest.mark.parametrize("operation", BOOLEAN_OPERATIONS)
+@pytest.mark.parametrize("case", CASES)
+def test_boolean_matches_point_membership(clipper, case, operation):
+    subject, clip = CASES[case]
+    result = clipper.boolean(subject, clip, operation)
+    # Случайные точки не попадают на границы входных многоугольников
+    points = np.random.default_rng(4).uniform(-6, 31, size=(2000, 2))
+    expected = EXPECTED[operation](inside(clipper, points, [subject]), inside(clipper, points, [clip]))
+    assert np.array_equal(inside(clipper, points, result), expected)
+    for polygon in result:
+        assert len(polygon['outer']) >= 3
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_boolean_areas_add_up(clipper, case):
+    subject, clip = CASES[case]
+    results = {operation: area(clipper.boolean(subject, clip, operation))
+               for operation in BOOLEAN_OPERATIONS}
+    assert results["union"] == pytest.approx(area([subject]) + area([clip]) - results["intersection"])
+    assert results["xor"] == pytest.approx(results["union"] - results["intersection"])
+    assert results["difference"] == pytest.approx(area([subject]) - results["intersection"])
+
+
+def test_identical_polygons(clipper):
+    assert area(clipper.boolean(SQUARE, SQUARE, "union")) == pytest.approx(100)
+    assert len(clipper.boolean(SQUARE, SQUARE, "intersection")) == 1
+    assert clipper.boolean(SQUARE, SQUARE, "difference") == []
+    assert clipper.boolean(SQUARE, SQUARE, "xor") == []
+
+
+def test_vertex_on_edge_has_no_spurious_hole(clipper):
+    subject, clip = CASES['vertex_on_edge']
+    result = clipper.boolean(subject, clip, "intersection")
+    assert len(result) == 1 and result[0]['inner'] == []
+    assert area(result) == pytest.approx(20)
+
+
+@pytest.mark.parametrize("snap", [0, -1e-6])
+def test_boolean_rejects_non_positive_snap(clipper, snap):
+    with pytest.raises(ValueError):
+        clipper.boolean(SQUARE, SQUARE, "union", snap=snap)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from project3 import LineDrawer
+
+
+@pytest.mark.parametrize("segment", [(0, 0, -8, -3), (3, -2, -7, 5), (-1, -1, -1, -9)])
+def test_dda_batch_matches_scalar_on_negative_coordinates(segment):
+    scalar, batch = LineDrawer(), LineDrawer()
+    scalar.dda_line(*segment)
+    batch.draw_lines([segment], "dda")
+    assert np.array_equal(scalar.buffer, batch.buffer)
+
+
+def test_dda_batch_matches_scalar_on_random_segments():
+    rng = np.random.default_rng(0)
+    scalar, batch = LineDrawer(), LineDrawer()
+    for segment in rng.integers(-15, 16, size=(500, 4)).tolist():
+        scalar.clear_buffer()
+        batch.clear_buffer()
+        scalar.dda_line(*segment)
+        batch.draw_lines([segment], "dda")
+        assert np.array_equal(scalar.buffer, batch.buffer), segment
+
+
+def test_dda_batch_of_mixed_lengths_matches_single_segments():
+    rng = np.random.default_rng(3)
+    short = rng.uniform(-50, 50, size=(300, 2))
+    segments = np.vstack([np.hstack([short, short + rng.uniform(-4, 4, size=(300, 2))]),
+                          [[-900.5, -20.25, 1100.0, 37.5], [3.0, 3.0, 3.0, 3.0]]])
+    drawer = LineDrawer()
+    xs, ys, index = drawer.line_pixels(segments, "dda")
+    for k in (0, 17, 299, 300, 301):
+        single_xs, single_ys, _ = drawer.line_pixels(segments[k:k + 1], "dda")
+        assert np.array_equal(xs[index == k], single_xs)
+        assert np.array_equal(ys[index == k], single_ys)
+
+
+def lit(drawer):
+    ys, xs = np.nonzero(drawer.buffer)
+    return set(zip(xs.tolist(), ys.tolist()))
+
+
+def test_run_pixels_are_tracked_and_cleared():
+    # Растр 64x64: отрезки занимают меньше четверти, очищаются только их пиксели
+    pixels, runs = LineDrawer(64, 64), LineDrawer(64, 64)
+    for drawer, draw in ((pixels, pixels.bresenham_line), (runs, runs.bresenham_runs)):
+        draw(-10, -3, 12, 7)
+        draw(5, -20, 8, 25)
+        drawer.set_pixels(np.array([-30.5, 20.0]), np.array([0.0, -31.0]))
+    assert runs.active_pixels == pixels.active_pixels == lit(pixels)
+    assert np.array_equal(runs.buffer, pixels.buffer)
+
+    runs.clear_buffer()
+    assert runs.active_pixels == set() and not runs.buffer.any()
+
+    # После очистки учитываются только новые пиксели
+    runs.bresenham_runs(-30, 30, -20, 30)
+    assert runs.active_pixels == lit(runs) == {(x, 62) for x in range(2, 13)}
@@ -0,0 +1,52 @@
+import numpy as np
+
+from project4 import CircleDrawer
+
+
+def lit(drawer):
+    ys, xs = np.nonzero(drawer.buffer)
+    return set(zip(xs.tolist(), ys.tolist()))
+
+
+def test_filled_circle_pixels_are_tracked_and_cleared():
+    # Растр 64x64: круг занимает меньше четверти, очищаются только его пиксели
+    spans = CircleDrawer(64, 64)
+    spans.set_pixel(-30, -30)
+    spans.filled_circle(2, -1, radius=9)
+
+    # Те же пиксели, записанные по одному
+    pixels = CircleDrawer(64, 64)
+    pixels.set_pixel(-30, -30)
+    ys, x0s, x1s = pixels.circle_spans(9)
+    for y, x0, x1 in zip(ys.tolist(), x0s.tolist(), x1s.tolist()):
+        for x in range(x0, x1 + 1):
+            pixels.set_pixel(x + 2, y - 1)
+    assert spans.active_pixels == pixels.active_pixels == lit(pixels)
+    assert np.array_equal(spans.buffer, pixels.buffer)
+
+    spans.clear_buffer()
+    assert spans.active_pixels == set() and not spans.buffer.any()
+
+    # После очистки учитываются только новые пиксели
+    spans.filled_circle(-20, 20, radius=3)
+    assert spans.active_pixels == lit(spans)
+    assert all(x < 32 and y > 32 for x, y in spans.active_pixels)
+
+
+def test_set_pixels_rounds_like_set_pixel():
+    xs = np.array([-0.5, -1.25, 0.75, 3.5, -15.5, 15.9])
+    ys = np.array([3.0, -2.5, -0.25, 1.5, 0.0, -16.0])
+    batch, scalar = CircleDrawer(), CircleDrawer()
+    batch.set_pixels(xs, ys)
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        scalar.set_pixel(x, y)
+    assert np.array_equal(batch.buffer, scalar.buffer)
+
+
+def test_polygon_circle_matches_scalar_lines():
+    batch, scalar = CircleDrawer(), CircleDrawer()
+    batch.polygon_circle(16)
+    x, y = scalar.polygon_vertices(16)
+    for i in range(16):
+        scalar.bresenham_line(x[i], y[i], x[(i + 1) % 16], y[(i + 1) % 16])
+    assert np.array_equal(batch.buffer, scalar.buffer)
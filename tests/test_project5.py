@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from project5 import LineClipper
+
+
+@pytest.fixture
+def clipper():
+    return LineClipper()
+
+
+@pytest.mark.parametrize("extent", [1e3, 1e40, 1e300, 1.7e308])
+def test_midpoint_clips_huge_segments_to_the_window(clipper, extent):
+    segment = (-extent, -extent / 2, extent, extent / 2)
+    expected = (-100, -50, 100, 50)
+    visible, clipped = clipper.midpoint_iterative(*segment)
+    assert visible
+    assert np.allclose(clipped, expected, atol=clipper.tolerance)
+
+    visible, clipped = clipper.midpoint_batch([segment, (0, 0, 1, 1)])
+    assert visible.all()
+    assert np.allclose(clipped[0], expected, atol=clipper.tolerance)
+
+
+def test_midpoint_stops_at_float_resolution(clipper):
+    # tolerance меньше шага float у концов: деление останавливается само
+    segment = (1e14, 0.5, -1e14, 0.5)
+    visible, clipped = clipper.midpoint_iterative(*segment, tolerance=1e-9)
+    assert visible and np.allclose(clipped, (100, 0.5, -100, 0.5))
+    visible, clipped = clipper.midpoint_batch([segment], tolerance=1e-9)
+    assert visible[0] and np.allclose(clipped[0], (100, 0.5, -100, 0.5))
+
+
+def test_midpoint_batch_matches_liang_barsky(clipper):
+    segments = np.random.default_rng(5).uniform(-150, 150, size=(2000, 4))
+    visible, clipped = clipper.midpoint_batch(segments)
+    expected_visible, expected = clipper.liang_barsky_batch(segments)
+    assert np.array_equal(visible, expected_visible)
+    assert np.allclose(clipped[visible], expected[visible], atol=clipper.tolerance)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from project7 import CyrusBeckExtendedClipper
+
+
+@pytest.fixture
+def clipper():
+    return CyrusBeckExtendedClipper()
+
+
+def piece_lengths(pieces):
+    pieces = np.asarray(pieces, dtype=np.float64).reshape(-1, 4)
+    return np.hypot(pieces[:, 2] - pieces[:, 0], pieces[:, 3] - pieces[:, 1])
+
+
+@pytest.mark.parametrize("mode", ["inside", "outside"])
+def test_inside_and_outside_parts_cover_each_segment(clipper, mode):
+    clipper.clip_mode = mode
+    clipper.update_polygon()
+    segments = np.random.default_rng(6).uniform(-5, 5, size=(2000, 4))
+    accepted, clipped = clipper.cyrus_beck_batch(segments)
+    offsets, pieces = clipper.exterior_clip_batch(segments)
+    assert accepted.any()
+
+    inside = np.where(accepted, piece_lengths(np.nan_to_num(clipped)), 0.0)
+    outside = np.add.reduceat(np.append(piece_lengths(pieces), 0.0), offsets[:-1])
+    outside[offsets[:-1] == offsets[1:]] = 0.0
+    assert np.allclose(inside + outside, piece_lengths(segments))
+
+
+@pytest.mark.parametrize("mode", ["inside", "outside"])
+def test_scalar_clipping_matches_batch(clipper, mode):
+    clipper.clip_mode = mode
+    clipper.update_polygon()
+    segments = np.random.default_rng(7).uniform(-5, 5, size=(300, 4))
+    accepted, clipped = clipper.cyrus_beck_batch(segments)
+    offsets, pieces = clipper.exterior_clip_batch(segments)
+    for k, (x1, y1, x2, y2) in enumerate(segments.tolist()):
+        visible, part, _ = clipper.cyrus_beck((x1, y1), (x2, y2))
+        assert visible == accepted[k]
+        if visible:
+            assert np.allclose(np.ravel(part), clipped[k])
+        exterior = clipper.exterior_clip((x1, y1), (x2, y2))
+        assert np.allclose(np.reshape(exterior, (-1, 4)), pieces[offsets[k]:offsets[k + 1]])
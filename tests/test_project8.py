@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from project8 import SutherlandHodgmanClipper
+
+
+@pytest.fixture
+def clipper():
+    return SutherlandHodgmanClipper()
+
+
+@pytest.mark.parametrize("window", [
+    [(0, 0), (10, 0), (5, 8)],
+    [(0, 0), (5, 8), (10, 0)],
+    [(0, 0), (0, 10), (10, 10), (10, 0)],
+])
+def test_stream_matches_array_for_either_window_orientation(clipper, window):
+    rng = np.random.default_rng(1)
+    polygons = [[tuple(p) for p in rng.uniform(-5, 15, size=(8, 2)).tolist()] for _ in range(200)]
+    for polygon, streamed in zip(polygons, clipper.clip_polygons(polygons, window)):
+        array = clipper.clip_polygon_array(polygon, window)
+        assert len(streamed) == len(array)
+        if len(array):
+            # Стадии могут начинать контур с разных вершин
+            streamed = np.asarray(streamed)
+            assert any(np.allclose(np.roll(streamed, -shift, axis=0), array)
+                       for shift in range(len(streamed)))
@@ -34,4 +34,151 @@ class GeometryUtils:
     def normalize_vector(v):
         """Нормализация вектора"""
         length = math.sqrt(v[0]**2 + v[1]**2)
-        return (v[0]/length, v[1]/length) if length > 0 else (0, 0) 
\ No newline at end of file
+        return (v[0]/length, v[1]/length) if length > 0 else (0, 0) 
+
+    @staticmethod
+    def convex_edges(vertices):
+        """Ребра выпуклого многоугольника в виде массивов: точки ребер (E, 2)
+        и внешние нормали (E, 2) без нормировки (обход вершин - в любую сторону)"""
+        points = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        edges = np.roll(points, -1, axis=0) - points
+        normals = np.stack([edges[:, 1], -edges[:, 0]], axis=1)
+        
+        # Правая нормаль внешняя при обходе против часовой стрелки
+        area = np.dot(points[:, 0], np.roll(points[:, 1], -1)) - \
+               np.dot(np.roll(points[:, 0], -1), points[:, 1])
+        if area < 0:
+            normals = -normals
+        return points, normals
+
+    @staticmethod
+    def clip_parameters(segments, normals, constants):
+        """Параметры входа и выхода прямых отрезков (N, 4) для выпуклой области
+        n·p <= c (n - внешние нормали ребер, c = n·f для точки f ребра).
+        
+        Возвращает t_enter, t_exit без ограничения отрезком [0, 1] и маску
+        отрезков, параллельных какому-либо ребру и лежащих снаружи от него.
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        p1 = segments[:, :2]
+        D = segments[:, 2:] - p1
+        
+        # Все пары (отрезок, ребро) одним матричным произведением
+        D_dot_n = D @ normals.T
+        w_dot_n = p1 @ normals.T - constants
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = -w_dot_n / D_dot_n
+        
+        t_enter = np.where(D_dot_n < 0, t, -np.inf).max(axis=1, initial=-np.inf)
+        t_exit = np.where(D_dot_n > 0, t, np.inf).min(axis=1, initial=np.inf)
+        blocked = ((D_dot_n == 0) & (w_dot_n > 0)).any(axis=1)
+        return t_enter, t_exit, blocked
+
+    @staticmethod
+    def cyrus_beck_batch(segments, normals, constants):
+        """Алгоритм Кируса-Бека для массива отрезков (N, 4).
+        Возвращает флаги видимости и отсеченные координаты (nan для невидимых)."""
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        t_enter, t_exit, blocked = GeometryUtils.clip_parameters(segments, normals, constants)
+        t_enter = np.maximum(t_enter, 0.0)
+        t_exit = np.minimum(t_exit, 1.0)
+        accepted = ~blocked & (t_enter <= t_exit)
+        
+        p1 = segments[:, :2]
+        D = segments[:, 2:] - p1
+        with np.errstate(invalid="ignore"):
+            clipped = np.concatenate([p1 + t_enter[:, np.newaxis] * D,
+                                      p1 + t_exit[:, np.newaxis] * D], axis=1)
+        clipped[~accepted] = np.nan
+        return accepted, clipped
+
+    @staticmethod
+    def grid_cells(segments, origin, cell_size):
+        """Ячейки равномерной сетки, через которые проходит каждый отрезок (N, 4).
+        Возвращает индексы отрезков, столбцы и строки ячеек (неровный массив пар).
+        
+        Отрезок обходится по столбцам: в каждом столбце берется диапазон y его
+        части внутри столбца, поэтому длинное диагональное ребро дает порядка
+        L / cell_size ячеек, а не весь габарит (L / cell_size)^2. Границы
+        расширяются на eps, чтобы точка на стыке ячеек попала в обе.
+        """
+        eps = 1e-9
+        p1 = (segments[:, :2] - origin) / cell_size
+        p2 = (segments[:, 2:] - origin) / cell_size
+        low, high = np.minimum(p1, p2), np.maximum(p1, p2)
+        first = np.maximum(np.floor(low[:, 0] - eps), 0).astype(np.int64)
+        width = np.floor(high[:, 0] + eps).astype(np.int64) - first + 1
+        
+        index = np.repeat(np.arange(len(segments)), width)
+        k = np.arange(width.sum()) - np.repeat(np.cumsum(width) - width, width)
+        columns = first[index] + k
+        
+        # Диапазон y части отрезка внутри столбца; вертикальный отрезок - весь габарит
+        x1, y1 = p1[index, 0], p1[index, 1]
+        dx, dy = p2[index, 0] - x1, p2[index, 1] - y1
+        xa = np.clip(columns, low[index, 0], high[index, 0])
+        xb = np.clip(columns + 1, low[index, 0], high[index, 0])
+        vertical = dx == 0
+        slope = np.divide(dy, dx, out=np.zeros_like(dy), where=~vertical)
+        ya, yb = y1 + (xa - x1) * slope, y1 + (xb - x1) * slope
+        y_low = np.where(vertical, low[index, 1], np.minimum(ya, yb))
+        y_high = np.where(vertical, high[index, 1], np.maximum(ya, yb))
+        bottom = np.maximum(np.floor(y_low - eps), 0).astype(np.int64)
+        height = np.floor(y_high + eps).astype(np.int64) - bottom + 1
+        
+        cell = np.repeat(np.arange(len(columns)), height)
+        k = np.arange(height.sum()) - np.repeat(np.cumsum(height) - height, height)
+        return index[cell], columns[cell], bottom[cell] + k
+
+    @staticmethod
+    def segment_intersections(segments_a, segments_b, cell_size=None):
+        """Все пересечения отрезков набора A (N, 4) с отрезками набора B (M, 4).
+        
+        Отрезки раскладываются по ячейкам равномерной сетки, и точная проверка
+        выполняется только для пар, попавших в общую ячейку, поэтому при
+        равномерно распределенных ребрах работа близка к линейной, а не O(N*M).
+        Возвращает индексы ребер (i, j), параметры t (на ребре A) и u (на ребре B)
+        и точки пересечения (K, 2). Коллинеарные перекрытия не сообщаются.
+        """
+        a = np.asarray(segments_a, dtype=np.float64).reshape(-1, 4)
+        b = np.asarray(segments_b, dtype=np.float64).reshape(-1, 4)
+        empty = np.zeros(0, dtype=np.int64)
+        if not len(a) or not len(b):
+            return empty, empty, np.zeros(0), np.zeros(0), np.zeros((0, 2))
+        
+        both = np.concatenate([a, b])
+        origin = np.minimum(both[:, :2], both[:, 2:]).min(axis=0)
+        if cell_size is None:
+            # Ячейка порядка средней длины ребра
+            extent = np.abs(both[:, 2:] - both[:, :2]).max(axis=1)
+            cell_size = max(float(extent.mean()), 1e-9)
+        
+        index_a, col_a, row_a = GeometryUtils.grid_cells(a, origin, cell_size)
+        index_b, col_b, row_b = GeometryUtils.grid_cells(b, origin, cell_size)
+        rows = int(max(row_a.max(), row_b.max())) + 1
+        key_a = col_a * rows + row_a
+        key_b = col_b * rows + row_b
+        
+        # Сопоставляем ячейки A с отсортированными ячейками B через searchsorted
+        order = np.argsort(key_b, kind="stable")
+        key_b, index_b = key_b[order], index_b[order]
+        start = np.searchsorted(key_b, key_a, side="left")
+        counts = np.searchsorted(key_b, key_a, side="right") - start
+        pair_a = np.repeat(index_a, counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_b = index_b[np.repeat(start, counts) + k]
+        
+        # Пара могла встретиться в нескольких общих ячейках
+        pairs = np.unique(pair_a * len(b) + pair_b)
+        i, j = pairs // len(b), pairs % len(b)
+        
+        p, r = a[i, :2], a[i, 2:] - a[i, :2]
+        q, s = b[j, :2], b[j, 2:] - b[j, :2]
+        qp = q - p
+        denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (qp[:, 0] * s[:, 1] - qp[:, 1] * s[:, 0]) / denominator
+            u = (qp[:, 0] * r[:, 1] - qp[:, 1] * r[:, 0]) / denominator
+        hit = (denominator != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        i, j, t, u = i[hit], j[hit], t[hit], u[hit]
+        return i, j, t, u, a[i, :2] + t[:, np.newaxis] * (a[i, 2:] - a[i, :2])
@@ -3,38 +3,424 @@
 """
 import pygame
 import numpy as np
+from collections import OrderedDict
+
+# Режимы хранения пикселей: значения всегда читаются и записываются как числа 0..1
+STORAGE_MODES = ("float64", "float32", "uint8", "bitplane")
 
 class GraphicsBuffer:
-    def __init__(self, width, height):
+    def __init__(self, width, height, palette=None, max_dirty_rects=16, mode="float64"):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {mode}")
         self.width = width
         self.height = height
-        self.buffer = np.zeros((height, width))
+        self.mode = mode
+        self.buffer = self._allocate()
         self.scale = 1
         self.offset = [0, 0]
         self.surface = pygame.Surface((width, height))
 
+        # Прямоугольники, измененные с последнего update() и с последней очистки
+        self.max_dirty_rects = max_dirty_rects
+        self.dirty_rects = []
+        self.painted_rects = []
+
+        self.set_palette(palette)
+
+    def _allocate(self):
+        """Создает массив хранения для текущего режима"""
+        if self.mode == "bitplane":
+            # 1 бит на пиксель, строки упакованы np.packbits (старший бит - левый пиксель)
+            return np.zeros((self.height, (self.width + 7) // 8), dtype=np.uint8)
+        return np.zeros((self.height, self.width), dtype=self.mode)
+
+    def set_palette(self, palette=None):
+        """Задает палитру: None (оттенки серого), массив цветов (N, 3) или функцию value -> RGB"""
+        self.palette = palette
+        self.lut = self._build_lut(palette)
+        # Смена палитры меняет только цвета, но не содержимое буфера
+        self.dirty_rects = [pygame.Rect(0, 0, self.width, self.height)]
+
+    def invalidate(self):
+        """Помечает весь буфер как измененный (например, после прямой записи в self.buffer)"""
+        self.dirty_rects = [pygame.Rect(0, 0, self.width, self.height)]
+        self.painted_rects = [pygame.Rect(0, 0, self.width, self.height)]
+
+    def _add_rect(self, rects, rect):
+        """Добавляет прямоугольник в список, сливая его с пересекающимися и соседними"""
+        while True:
+            index = rect.inflate(2, 2).collidelist(rects)
+            if index < 0:
+                break
+            rect = rect.union(rects.pop(index))
+
+        if len(rects) >= self.max_dirty_rects:
+            # Сливаем с прямоугольником, дающим наименьший прирост площади
+            def growth(other):
+                union = rect.union(other)
+                return union.w * union.h - other.w * other.h
+            best = min(range(len(rects)), key=lambda i: growth(rects[i]))
+            self._add_rect(rects, rect.union(rects.pop(best)))
+            return
+        rects.append(rect)
+
+    def mark_dirty(self, x, y, w=1, h=1):
+        """Отмечает измененную область в координатах буфера"""
+        rect = pygame.Rect(x, y, w, h).clip(0, 0, self.width, self.height)
+        if rect.w and rect.h:
+            self._add_rect(self.dirty_rects, rect)
+            self._add_rect(self.painted_rects, rect)
+
+    @staticmethod
+    def _build_lut(palette):
+        """Строит таблицу 256 цветов, по которой 8-битный уровень переводится в RGB"""
+        if palette is None:
+            return None
+        levels = np.linspace(0.0, 1.0, 256)
+        if callable(palette):
+            colors = np.asarray(palette(levels), dtype=np.float64)
+        else:
+            colors = np.asarray(palette, dtype=np.float64)
+            # Растягиваем палитру из N цветов на 256 уровней
+            index = np.rint(levels * (len(colors) - 1)).astype(np.intp)
+            colors = colors[index]
+        return np.clip(colors[:, :3], 0, 255).astype(np.uint8)
+
+    def _levels(self, rect):
+        """Возвращает 8-битные уровни яркости прямоугольной области буфера"""
+        if self.mode == "bitplane":
+            first_byte = rect.left // 8
+            last_byte = (rect.right + 7) // 8
+            bits = np.unpackbits(self.buffer[rect.top:rect.bottom, first_byte:last_byte], axis=1)
+            start = rect.left - first_byte * 8
+            return bits[:, start:start + rect.w] * np.uint8(255)
+
+        region = self.buffer[rect.top:rect.bottom, rect.left:rect.right]
+        if self.mode == "uint8":
+            return region
+        return (np.clip(region, 0.0, 1.0) * 255).astype(np.uint8)
+
+    def _colorize(self, levels):
+        """Переводит 8-битные уровни в RGB через палитру"""
+        if self.lut is None:
+            return np.repeat(levels[..., np.newaxis], 3, axis=-1)
+        return self.lut[levels]
+
+    def to_rgb(self, values=None):
+        """Преобразует значения (по умолчанию весь буфер) в 8-битный RGB-массив формы (height, width, 3)"""
+        if values is None:
+            levels = self._levels(pygame.Rect(0, 0, self.width, self.height))
+        else:
+            levels = (np.clip(values, 0.0, 1.0) * 255).astype(np.uint8)
+        return self._colorize(levels)
+
+    def _encode(self, values):
+        """Переводит значения 0..1 в формат хранения (кроме bitplane)"""
+        if self.mode == "uint8":
+            return (np.clip(values, 0.0, 1.0) * 255).astype(np.uint8)
+        return values
+
+    def _write(self, screen_y, screen_x, values):
+        """Записывает массив значений по уже отсеченным координатам буфера"""
+        if self.mode != "bitplane":
+            self.buffer[screen_y, screen_x] = self._encode(values)
+            return
+
+        byte_index = screen_x >> 3
+        masks = (0x80 >> (screen_x & 7)).astype(np.uint8)
+        on = np.asarray(values) > 0
+        np.bitwise_and.at(self.buffer, (screen_y[~on], byte_index[~on]), ~masks[~on])
+        np.bitwise_or.at(self.buffer, (screen_y[on], byte_index[on]), masks[on])
+
     def clear(self):
-        self.buffer.fill(0)
-        self.surface.fill((0, 0, 0))
+        """Обнуляет только области, записанные с последней очистки"""
+        for rect in self.painted_rects:
+            if self.mode == "bitplane":
+                # Расширяем до границ байтов: соседние пиксели либо уже нулевые,
+                # либо тоже входят в записанные области
+                left = rect.left // 8 * 8
+                right = min((rect.right + 7) // 8 * 8, self.width)
+                rect = pygame.Rect(left, rect.top, right - left, rect.h)
+                self.buffer[rect.top:rect.bottom, left // 8:(right + 7) // 8] = 0
+            else:
+                self.buffer[rect.top:rect.bottom, rect.left:rect.right] = 0
+            self._add_rect(self.dirty_rects, rect)
+        self.painted_rects = []
 
     def set_pixel(self, x, y, value=1):
         screen_x = int(x + self.offset[0])
         screen_y = int(y + self.offset[1])
         if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
-            self.buffer[screen_y, screen_x] = value
-            color = (int(value * 255), int(value * 255), int(value * 255))
-            self.surface.set_at((screen_x, screen_y), color)
+            if self.mode == "bitplane":
+                mask = 0x80 >> (screen_x & 7)
+                if value > 0:
+                    self.buffer[screen_y, screen_x >> 3] |= mask
+                else:
+                    self.buffer[screen_y, screen_x >> 3] &= ~mask & 0xFF
+            elif self.mode == "uint8":
+                self.buffer[screen_y, screen_x] = int(min(max(value, 0.0), 1.0) * 255)
+            else:
+                self.buffer[screen_y, screen_x] = value
+            self.mark_dirty(screen_x, screen_y)
+
+    def _to_screen(self, xs, ys):
+        """Переводит массивы координат в целочисленные координаты буфера"""
+        screen_x = (np.asarray(xs) + self.offset[0]).astype(np.intp)
+        screen_y = (np.asarray(ys) + self.offset[1]).astype(np.intp)
+        if screen_x.shape == screen_y.shape:
+            return screen_x, screen_y
+        return np.broadcast_arrays(screen_x, screen_y)
+
+    def set_pixels(self, xs, ys, values=1):
+        """Записывает массив пикселей за один вызов (с отсечением по границам буфера)"""
+        screen_x, screen_y = self._to_screen(xs, ys)
+
+        inside = (screen_x >= 0) & (screen_x < self.width) & \
+                 (screen_y >= 0) & (screen_y < self.height)
+        screen_x, screen_y = screen_x[inside], screen_y[inside]
+        if np.ndim(values) > 0:
+            values = np.broadcast_to(values, inside.shape)[inside]
+        if screen_x.size == 0:
+            return
+
+        self._write(screen_y, screen_x, values)
+        x_min, y_min = int(screen_x.min()), int(screen_y.min())
+        self.mark_dirty(x_min, y_min,
+                        int(screen_x.max()) - x_min + 1, int(screen_y.max()) - y_min + 1)
+
+    def set_spans(self, ys, x0s, x1s, values=1):
+        """Заполняет горизонтальные отрезки строк [x0, x1] (включительно) за один вызов"""
+        x0s, x1s = np.asarray(x0s), np.asarray(x1s)
+        start_x, screen_y = self._to_screen(np.minimum(x0s, x1s), ys)
+        end_x, _ = self._to_screen(np.maximum(x0s, x1s), ys)
+        values = np.broadcast_to(values, screen_y.shape)
+
+        # Отсекаем строки вне буфера и обрезаем концы отрезков
+        start_x = np.maximum(start_x, 0)
+        end_x = np.minimum(end_x, self.width - 1)
+        visible = (screen_y >= 0) & (screen_y < self.height) & (start_x <= end_x)
+        start_x, end_x = start_x[visible], end_x[visible]
+        screen_y, values = screen_y[visible], values[visible]
+        if screen_y.size == 0:
+            return
+
+        # Разворачиваем отрезки в индексы пикселей без цикла по Python
+        lengths = end_x - start_x + 1
+        first = np.cumsum(lengths) - lengths
+        columns = np.arange(lengths.sum()) - np.repeat(first - start_x, lengths)
+        self._write(np.repeat(screen_y, lengths), columns, np.repeat(values, lengths))
+
+        x_min, y_min = int(start_x.min()), int(screen_y.min())
+        self.mark_dirty(x_min, y_min,
+                        int(end_x.max()) - x_min + 1, int(screen_y.max()) - y_min + 1)
 
     def get_pixel(self, x, y):
         screen_x = int(x + self.offset[0])
         screen_y = int(y + self.offset[1])
         if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
+            if self.mode == "bitplane":
+                return (self.buffer[screen_y, screen_x >> 3] >> (7 - (screen_x & 7))) & 1
+            if self.mode == "uint8":
+                return self.buffer[screen_y, screen_x] / 255
             return self.buffer[screen_y, screen_x]
         return 0
 
     def update(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                value = self.buffer[y, x]
-                color = (int(value * 255), int(value * 255), int(value * 255))
-                self.surface.set_at((x, y), color)
\ No newline at end of file
+        """Копирует на поверхность только измененные области.
+
+        Возвращает список обновленных прямоугольников (в координатах поверхности)
+        для передачи в pygame.display.update(rects).
+        """
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        for rect in rects:
+            # surfarray индексируется как [x, y], поэтому транспонируем
+            pygame.surfarray.blit_array(self.surface.subsurface(rect),
+                                        self._colorize(self._levels(rect)).transpose(1, 0, 2))
+        return rects
+
+
+class TouchedPixels:
+    """Пиксели растра шириной width, записанные с последней очистки.
+
+    Отдельные пиксели хранятся индексами в развернутом буфере, пакеты и
+    серии - блоками (массивами индексов или срезами); в координаты (x, y)
+    они разворачиваются только при обращении к active_pixels. Поэтому запись
+    серии стоит O(1) независимо от ее длины.
+    """
+    def __init__(self, width, track=True):
+        self.width = width
+        self.indices = []
+        self.blocks = []
+        self.count = 0  # Число пикселей во всех блоках
+        
+        # Множество (x, y) без повторов можно отключить; кэшируется до
+        # следующей записи или очистки
+        self.track = track
+        self._active_pixels = set()
+        self._active_key = None
+
+    def add_pixel(self, x, y):
+        self.indices.append(y * self.width + x)
+
+    def add_pixels(self, xs, ys):
+        """Пакет пикселей из массивов координат растра"""
+        self.blocks.append(ys * self.width + xs)
+        self.count += xs.size
+
+    def add_row(self, y, start, stop):
+        """Серия пикселей строки y со столбцами [start, stop)"""
+        row = y * self.width
+        self.blocks.append(slice(row + start, row + stop))
+        self.count += stop - start
+
+    def add_column(self, x, start, stop):
+        """Серия пикселей столбца x со строками [start, stop)"""
+        self.blocks.append(slice(start * self.width + x, (stop - 1) * self.width + x + 1, self.width))
+        self.count += stop - start
+
+    def clear(self, buffer):
+        """Обнуляет записанные пиксели буфера за время, пропорциональное их числу
+        (при заполнении больше четверти буфера дешевле очистить его целиком)"""
+        if len(self.indices) + self.count > buffer.size // 4:
+            buffer.fill(0)
+        else:
+            flat = buffer.reshape(-1)
+            flat[self.indices] = 0
+            for block in self.blocks:
+                flat[block] = 0
+        self.indices = []
+        self.blocks = []
+        self.count = 0
+        self._active_key = None
+
+    @property
+    def active_pixels(self):
+        """Множество записанных пикселей (x, y)"""
+        if not self.track:
+            return set()
+        key = (len(self.indices), len(self.blocks), self.count)
+        if key != self._active_key:
+            blocks = [np.arange(block.start, block.stop, block.step) if isinstance(block, slice)
+                      else block for block in self.blocks]
+            indices = np.unique(np.concatenate([np.asarray(self.indices, dtype=np.intp)] + blocks))
+            ys, xs = np.divmod(indices, self.width)
+            self._active_pixels = set(zip(xs.tolist(), ys.tolist()))
+            self._active_key = key
+        return self._active_pixels
+
+
+class StencilCache:
+    """LRU-кэш растровых шаблонов фигур (массивов смещений пикселей от центра)"""
+    def __init__(self, max_entries=256, max_pixels=1_000_000):
+        self.max_entries = max_entries
+        self.max_pixels = max_pixels
+        self.entries = OrderedDict()
+        self.pixels = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, build):
+        """Возвращает шаблон (dx, dy) по ключу, при промахе строит его функцией build()"""
+        stencil = self.entries.get(key)
+        if stencil is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return stencil
+
+        self.misses += 1
+        dx, dy = (np.asarray(offsets, dtype=np.int64) for offsets in build())
+        # Шаблоны разделяются между вызовами, поэтому запрещаем запись в них
+        dx.setflags(write=False)
+        dy.setflags(write=False)
+        stencil = (dx, dy)
+
+        self.entries[key] = stencil
+        self.pixels += dx.size
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or
+                                         self.pixels > self.max_pixels):
+            _, (old_dx, _) = self.entries.popitem(last=False)
+            self.pixels -= old_dx.size
+            self.evictions += 1
+        return stencil
+
+    def clear(self):
+        self.entries.clear()
+        self.pixels = 0
+
+    def stats(self):
+        """Счетчики попаданий и промахов"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "pixels": self.pixels,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class LineRasterizer:
+    """Пакетная растеризация отрезков (общая для проектов рисования линий и окружностей)"""
+
+    @staticmethod
+    def line_pixels(segments, algorithm="bresenham"):
+        """Пакетная растеризация отрезков без цикла по пикселям.
+
+        segments - массив (N, 4) строк [x1, y1, x2, y2].
+        Возвращает массивы xs, ys всех пикселей и индекс отрезка для каждого пикселя.
+        Вариант "bresenham" попиксельно совпадает с bresenham_line проектов 3 и 4,
+        вариант "dda" - с dda_line проекта 3.
+        """
+        segments = np.asarray(segments).reshape(-1, 4)
+        if algorithm == "bresenham":
+            segments = segments.astype(np.int64)
+        x1, y1, x2, y2 = segments.T
+        dx = x2 - x1
+        dy = y2 - y1
+        steps = np.maximum(np.abs(dx), np.abs(dy))
+        
+        # Раскладываем все отрезки в один плоский массив шагов
+        counts = (steps + 1).astype(np.intp)
+        segment_index = np.repeat(np.arange(len(segments)), counts)
+        i = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        
+        if algorithm == "dda":
+            # Накопление приращений построчным cumsum повторяет сложения dda_line
+            # и дает те же округления, что и скалярная версия. Чтобы не дополнять
+            # все отрезки до самого длинного, строки группируются по степени двойки
+            # длины: внутри группы дополнение меньше чем вдвое, память O(пикселей)
+            safe_steps = np.where(steps == 0, 1, steps)
+            x_inc, y_inc = dx / safe_steps, dy / safe_steps
+            starts = np.cumsum(counts) - counts
+            groups = np.frexp(counts)[1]
+            xs = np.empty(len(i))
+            ys = np.empty(len(i))
+            for group in np.unique(groups):
+                rows = np.flatnonzero(groups == group)
+                width = int(counts[rows].max())
+                filled = np.arange(width) < counts[rows][:, np.newaxis]
+                target = np.repeat(starts[rows], counts[rows]) + np.nonzero(filled)[1]
+                for out, start, inc in ((xs, x1, x_inc), (ys, y1, y_inc)):
+                    block = np.empty((len(rows), width))
+                    block[:, 0] = start[rows]
+                    block[:, 1:] = inc[rows, np.newaxis]
+                    out[target] = np.cumsum(block, axis=1)[filled]
+            return xs, ys, segment_index
+        
+        # Брезенхем в замкнутой форме: после i шагов по главной оси
+        # число шагов по второй оси равно ceil((2*i*minor - major) / (2*major))
+        major = steps[segment_index]
+        minor = np.minimum(np.abs(dx), np.abs(dy))[segment_index]
+        safe_major = np.where(major == 0, 1, major)
+        minor_steps = -((major - 2 * i * minor) // (2 * safe_major))
+        
+        # Как и в bresenham_line, при |dx| == |dy| главной считается ось y
+        x_major = (np.abs(dx) > np.abs(dy))[segment_index]
+        step_x = np.where(dx > 0, 1, -1)[segment_index]
+        step_y = np.where(dy > 0, 1, -1)[segment_index]
+        xs = x1[segment_index] + np.where(x_major, i, minor_steps) * step_x
+        ys = y1[segment_index] + np.where(x_major, minor_steps, i) * step_y
+        return xs, ys, segment_index